@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Extractor Benchmark
+Runs every PDF engine in pdf_to_txt.py and every extractor in
+extract_all_files.py over a corpus and reports pages/s, MB/s, peak RSS and
+output size per engine and file type, optionally saving the results as JSON
+and comparing them with an earlier run
+"""
+
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from cli_options import pop_flag, pop_option
+
+RESULTS_VERSION = 1
+DEFAULT_TYPES = '.pdf,.pptx,.docx,.xlsx'
+# A throughput drop or peak RSS rise of more than this (in %) counts as a regression
+DEFAULT_THRESHOLD = 10.0
+
+
+def _pdf_engine(name):
+    def run(path):
+        import pdf_to_txt
+        iter_pages = dict(pdf_to_txt.ENGINES)[name]
+        return pdf_to_txt.page_parts(iter_pages(path))
+    return run
+
+
+def _extractor(name):
+    def run(path):
+        import extract_all_files
+        return [getattr(extract_all_files, name)(path)]
+    return run
+
+
+def _streaming_extractor(module, name):
+    def run(path):
+        return getattr(importlib.import_module(module), name)(path)
+    return run
+
+
+# suffix -> [(engine name, run(path) -> iterable of text parts, modules to preload)]
+BENCH_ENGINES = {
+    '.pdf': [
+        ('pypdf', _pdf_engine('pypdf'), ['pypdf', 'pdfplumber']),
+        ('pdfplumber', _pdf_engine('pdfplumber'), ['pdfplumber']),
+        ('PyPDF2', _pdf_engine('PyPDF2'), ['PyPDF2']),
+        ('extract_pdf', _streaming_extractor('extract_all_files', 'iter_extract_pdf'), ['pdfplumber']),
+    ],
+    '.pptx': [
+        ('python-pptx', _extractor('extract_pptx'), ['pptx']),
+        ('ooxml_text', _streaming_extractor('ooxml_text', 'iter_pptx_parts'), []),
+    ],
+    '.docx': [
+        ('python-docx', _extractor('extract_docx'), ['docx']),
+        ('ooxml_text', _streaming_extractor('ooxml_text', 'iter_docx_parts'), []),
+    ],
+    '.xlsx': [
+        ('openpyxl', _streaming_extractor('extract_all_files', 'iter_extract_xlsx'), ['openpyxl']),
+    ],
+}
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None if unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def count_units(path):
+    """Return the number of pages (PDF) or slides (PPTX) in a file, or None"""
+    suffix = path.suffix.lower()
+    try:
+        if suffix == '.pdf':
+            from pdf_to_txt import count_pages
+            return count_pages(path)
+        if suffix == '.pptx':
+            from ooxml_text import count_slides
+            return count_slides(path)
+    except Exception:
+        pass
+    return None
+
+
+def measure(suffix, engine, path):
+    """Run one engine over one file and return its timing, output size and peak RSS.
+
+    Meant to run in a fresh worker process so peak RSS belongs to this run
+    alone; the engine's libraries are imported before the clock starts.
+    """
+    run, modules = next((run, modules) for name, run, modules in BENCH_ENGINES[suffix] if name == engine)
+    for module in ['extract_all_files', 'pdf_to_txt', 'ooxml_text'] + modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    output_bytes = 0
+    start = time.perf_counter()
+    try:
+        for part in run(path):
+            output_bytes += len(part.encode('utf-8'))
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {
+        'seconds': time.perf_counter() - start,
+        'output_bytes': output_bytes,
+        'peak_rss_mb': peak_rss_mb(),
+        'error': None,
+    }
+
+
+def measure_fresh(suffix, engine, path):
+    """Run measure() in a brand-new worker process"""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(measure, suffix, engine, path).result()
+
+
+def find_corpus(paths, types):
+    """Return the files under paths (files or folders) whose suffix is in types"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in types))
+        elif path.suffix.lower() in types:
+            files.append(path)
+    return files
+
+
+def benchmark(files, repeat=1, engines=None):
+    """Benchmark every applicable engine on every file; return a list of per-run records.
+
+    Each file/engine pair runs ``repeat`` times and keeps the fastest time.
+    """
+    records = []
+    for path in files:
+        suffix = path.suffix.lower()
+        size = path.stat().st_size
+        units = count_units(path)
+        for engine, _, _ in BENCH_ENGINES.get(suffix, []):
+            if engines and engine not in engines:
+                continue
+            runs = [measure_fresh(suffix, engine, str(path)) for _ in range(repeat)]
+            record = {'file': path.name, 'type': suffix[1:], 'engine': engine,
+                      'bytes': size, 'pages': units}
+            errors = [r['error'] for r in runs if r['error']]
+            if errors:
+                record['error'] = errors[0]
+                print(f"✗ {engine:<12} {path.name}: {errors[0]}")
+            else:
+                record['seconds'] = min(r['seconds'] for r in runs)
+                record['output_bytes'] = runs[0]['output_bytes']
+                rss = [r['peak_rss_mb'] for r in runs if r['peak_rss_mb'] is not None]
+                record['peak_rss_mb'] = max(rss) if rss else None
+                print(f"✓ {engine:<12} {path.name}: {record['seconds']:.3f}s")
+            records.append(record)
+    return records
+
+
+def summarize(records):
+    """Aggregate per-file records into totals and rates keyed by 'engine/type'"""
+    summary = {}
+    for record in records:
+        if record.get('error'):
+            continue
+        entry = summary.setdefault(f"{record['engine']}/{record['type']}", {
+            'files': 0, 'pages': 0, 'bytes': 0, 'seconds': 0.0,
+            'output_bytes': 0, 'peak_rss_mb': None,
+        })
+        entry['files'] += 1
+        entry['pages'] += record['pages'] or 0
+        entry['bytes'] += record['bytes']
+        entry['seconds'] += record['seconds']
+        entry['output_bytes'] += record['output_bytes']
+        if record['peak_rss_mb'] is not None:
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0, record['peak_rss_mb'])
+    for entry in summary.values():
+        seconds = entry['seconds'] or 1e-9
+        entry['pages_per_sec'] = entry['pages'] / seconds if entry['pages'] else None
+        entry['mb_per_sec'] = entry['bytes'] / (1024 * 1024) / seconds
+    return summary
+
+
+def _fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def _pct(value):
+    return '-' if value is None else f"{value:+.1f}%"
+
+
+def print_summary(summary):
+    """Print one line per engine and file type"""
+    print(f"\n{'Engine/type':<24} {'Files':>5} {'Pages':>6} {'Input MB':>9} {'Pages/s':>8} "
+          f"{'MB/s':>7} {'Peak RSS':>9} {'Output KB':>10}")
+    for key in sorted(summary):
+        entry = summary[key]
+        print(f"{key:<24} {entry['files']:>5} {entry['pages'] or '-':>6} "
+              f"{entry['bytes'] / (1024 * 1024):>9.2f} {_fmt(entry['pages_per_sec'], '.1f'):>8} "
+              f"{entry['mb_per_sec']:>7.2f} {_fmt(entry['peak_rss_mb'], '.0f') + ' MB':>9} "
+              f"{entry['output_bytes'] / 1024:>10.1f}")
+
+
+def _change(new, old):
+    """Percentage change from old to new, or None if either is missing"""
+    if new is None or not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(summary, previous, threshold=DEFAULT_THRESHOLD):
+    """Print the change against a previous summary; return the number of regressions.
+
+    Throughput is compared as MB/s so runs over different corpora stay
+    comparable; a drop of more than threshold percent, or a rise in peak
+    RSS of more than threshold percent, is reported as a regression.
+    """
+    regressions = 0
+    print(f"\nCompared with previous run (threshold {threshold:.0f}%):")
+    for key in sorted(set(summary) | set(previous)):
+        if key not in summary or key not in previous:
+            print(f"  {key:<24} only in {'previous' if key in previous else 'this'} run")
+            continue
+        new, old = summary[key], previous[key]
+        speed = _change(new['mb_per_sec'], old['mb_per_sec'])
+        pages = _change(new.get('pages_per_sec'), old.get('pages_per_sec'))
+        rss = _change(new.get('peak_rss_mb'), old.get('peak_rss_mb'))
+        regressed = (speed is not None and speed < -threshold) or (rss is not None and rss > threshold)
+        regressions += regressed
+        mark = '✗' if regressed else '✓'
+        note = '' if new['files'] == old['files'] else f"  ({old['files']} -> {new['files']} files)"
+        print(f"{mark} {key:<24} MB/s {_pct(speed)}  pages/s {_pct(pages)}  peak RSS {_pct(rss)}{note}")
+    return regressions
+
+
+def save_results(path, records, summary):
+    """Write the run's records and summary as JSON"""
+    data = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'records': records,
+        'summary': summary,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_summary(path):
+    """Load the summary of a saved run"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != RESULTS_VERSION:
+        raise SystemExit(f"Error: {path} is not a version {RESULTS_VERSION} benchmark file")
+    return data['summary']
+
+
+def print_usage():
+    print("Usage: python3 benchmark_extractors.py [file_or_folder ...] [--save results.json]")
+    print("   or: python3 benchmark_extractors.py [file_or_folder ...] --compare previous.json")
+    print("\nBenchmarks the current folder when no files or folders are given.")
+    print("\nOptions:")
+    print("  --repeat N         Run each engine N times per file and keep the fastest")
+    print(f"  --types LIST       File types to include (default {DEFAULT_TYPES})")
+    print("  --engines LIST     Only run these engines, e.g. pypdf,pdfplumber")
+    print("  --save FILE        Save per-file results and the summary as JSON")
+    print("  --compare FILE     Compare with a saved run; exits 1 on regressions")
+    print(f"  --threshold PCT    Change that counts as a regression (default {DEFAULT_THRESHOLD:.0f}%)")
+    print("\nEngines:")
+    for suffix, entries in BENCH_ENGINES.items():
+        print(f"  {suffix[1:]:<6} {', '.join(name for name, _, _ in entries)}")
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    if pop_flag(args, '--help') or pop_flag(args, '-h'):
+        print_usage()
+        return
+    repeat = pop_option(args, '--repeat', 1, int)
+    types = pop_option(args, '--types', DEFAULT_TYPES)
+    engines = pop_option(args, '--engines')
+    save_path = pop_option(args, '--save')
+    compare_path = pop_option(args, '--compare')
+    threshold = pop_option(args, '--threshold', DEFAULT_THRESHOLD, float)
+
+    types = {t if t.startswith('.') else f'.{t}' for t in types.lower().split(',')}
+    engines = set(engines.split(',')) if engines else None
+    previous = load_summary(compare_path) if compare_path else None
+
+    files = find_corpus(args or ['.'], types)
+    if not files:
+        print("No files to benchmark")
+        sys.exit(1)
+
+    print(f"Benchmarking {len(files)} file(s)...\n")
+    records = benchmark(files, repeat, engines)
+    summary = summarize(records)
+    print_summary(summary)
+
+    if save_path:
+        save_results(save_path, records, summary)
+        print(f"\n✓ Results saved to {save_path}")
+
+    if previous is not None and compare(summary, previous, threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Line Wrapping Benchmark
+Times format_for_print.py's LineWrapper against textwrap on the long lines of
+real transcripts (safdi/transcripts/*.txt by default), checking that every
+engine produces exactly the same lines
+"""
+
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+from cli_options import pop_flag, pop_option
+from format_for_print import LineWrapper, PrintFormatter
+
+DEFAULT_CORPUS = 'safdi/transcripts'
+
+
+def load_paragraphs(paths, width):
+    """Return every line longer than width from the .txt files under paths (files or folders)"""
+    paragraphs = []
+    for path in map(Path, paths):
+        files = sorted(path.glob('*.txt')) if path.is_dir() else [path]
+        for txt_file in files:
+            with open(txt_file, 'r', encoding='utf-8') as f:
+                paragraphs.extend(line for line in f.read().split('\n') if len(line) > width)
+    return paragraphs
+
+
+def wrap_engines(width, indent):
+    """Return ``[(name, wrap(paragraph) -> lines)]`` for every engine"""
+    wrapper = textwrap.TextWrapper(width=width, initial_indent=indent, subsequent_indent=indent)
+    return [
+        ('textwrap.wrap', lambda paragraph: textwrap.wrap(paragraph, width=width, initial_indent=indent,
+                                                           subsequent_indent=indent)),
+        ('TextWrapper', wrapper.wrap),
+        ('LineWrapper', LineWrapper(width, indent, indent).wrap),
+    ]
+
+
+def time_engine(wrap, paragraphs, repeat):
+    """Return the fastest of repeat passes over paragraphs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for paragraph in paragraphs:
+            wrap(paragraph)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def first_mismatch(wrap, reference, paragraphs):
+    """Return the first paragraph wrap breaks differently from reference, or None"""
+    for paragraph in paragraphs:
+        if wrap(paragraph) != reference(paragraph):
+            return paragraph
+    return None
+
+
+def print_usage():
+    print("Usage: python3 benchmark_wrap.py [file_or_folder ...] [--repeat N]")
+    print(f"\nBenchmarks {DEFAULT_CORPUS}/*.txt when no files or folders are given.")
+    print("\nOptions:")
+    print("  --repeat N         Wrap the corpus N times per engine and keep the fastest (default 3)")
+    print("  --width N          Line width including the margin (default: PrintFormatter's)")
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    if pop_flag(args, '--help') or pop_flag(args, '-h'):
+        print_usage()
+        return
+    formatter = PrintFormatter()
+    repeat = pop_option(args, '--repeat', 3, int)
+    width = pop_option(args, '--width', formatter.content_width, int)
+    indent = ' ' * formatter.margin_left
+
+    paragraphs = load_paragraphs(args or [DEFAULT_CORPUS], width)
+    if not paragraphs:
+        print(f"No lines longer than {width} characters found")
+        sys.exit(1)
+    size_mb = sum(len(paragraph.encode('utf-8')) for paragraph in paragraphs) / (1024 * 1024)
+    print(f"Wrapping {len(paragraphs)} long line(s), {size_mb:.2f} MB, at width {width}...\n")
+
+    engines = wrap_engines(width, indent)
+    reference = engines[0][1]
+    baseline = None
+    failed = False
+    print(f"{'Engine':<16} {'Seconds':>8} {'MB/s':>8} {'Speedup':>8}")
+    for name, wrap in engines:
+        mismatch = first_mismatch(wrap, reference, paragraphs)
+        if mismatch is not None:
+            print(f"✗ {name} wraps differently from textwrap, e.g. {mismatch[:60]!r}...")
+            failed = True
+            continue
+        seconds = time_engine(wrap, paragraphs, repeat)
+        baseline = baseline or seconds
+        print(f"{name:<16} {seconds:>8.3f} {size_mb / seconds:>8.2f} {baseline / seconds:>7.1f}x")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
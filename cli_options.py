@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Command Line Option Helpers
+Small helpers shared by the extraction and formatting scripts for pulling
+optional ``--flag`` / ``--option value`` arguments out of ``sys.argv``
+"""
+
+
+def pop_flag(args, name):
+    """Remove a boolean flag from args and return whether it was present"""
+    if name in args:
+        args.remove(name)
+        return True
+    return False
+
+
+def pop_option(args, name, default=None, convert=str):
+    """Remove ``name value`` (or ``name=value``) from args and return the value"""
+    for i, arg in enumerate(args):
+        if arg == name:
+            if i + 1 >= len(args):
+                raise SystemExit(f"Error: {name} requires a value")
+            value = args[i + 1]
+            del args[i:i + 2]
+            return convert(value)
+        if arg.startswith(name + '='):
+            del args[i]
+            return convert(arg[len(name) + 1:])
+    return default
+
+
+def job_count(value):
+    """Convert a --jobs value, where 0 means one job per CPU core"""
+    import os
+
+    jobs = int(value)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
@@ -4,22 +4,74 @@ Universal File Extractor
 Extracts text from PDFs, PPTX, DOCX, XLSX, and other file types
 """
 
+import csv
 import os
+import re
+import shutil
+import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-def extract_pdf(pdf_path):
-    """Extract text from PDF"""
+import pipeline_stats
+from cli_options import pop_flag, pop_option, job_count
+from extraction_cache import ExtractionCache, file_sha256
+from extraction_io import PageMarker, join_parts, publish_extracted, spool_path_for, write_parts
+from extraction_manifest import Manifest
+from extraction_sandbox import SandboxExecutor, WorkerDied, WorkerTimeout
+from ocr_engine import iter_ocr_blank_pages, ocr_image
+from ooxml_text import iter_docx_parts, iter_pptx_parts
+from pdf_to_txt import PARALLEL_MIN_PAGES, count_pages, parse_pages, release_pdf_page, split_page_range
+
+MANIFEST_NAME = '.extract_manifest.json'
+
+# Offline audio transcription settings
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_CHUNK_SEC = 30
+SILENCE_SEARCH_SEC = 5
+WHISPER_MODEL = os.environ.get('WHISPER_MODEL', 'small')
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.pptx', '.docx', '.xlsx', '.mp3', '.m4a', '.wav',
+                        '.png', '.jpg', '.jpeg', '.gif', '.tiff']
+
+
+class ExtractionError(Exception):
+    """Raised when a supported file could not be extracted"""
+
+def iter_pdf_pages(pdf_path, page_range=None):
+    """Yield ``(page_number, text)`` for each page of a PDF as it is extracted.
+    
+    page_range optionally restricts extraction to a range of 0-based page indexes.
+    """
+    import pdfplumber
+    selected = [i + 1 for i in page_range] if page_range is not None else None
+    with pipeline_stats.stage('open', pdf_path):
+        pdf = pdfplumber.open(pdf_path, pages=selected)
+    with pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            release_pdf_page(page)
+            yield page.page_number, text
+
+def iter_extract_pdf(pdf_path, page_range=None, ocr_jobs=1):
+    """Yield the parts of extract_pdf's output one page at a time.
+    
+    Pages without a text layer are OCRed (across ocr_jobs processes) when
+    Tesseract is available; pages that already have text are never rendered.
+    """
     try:
-        import pdfplumber
-        text = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text.append(f"\n--- Page {page_num + 1} ---\n")
-                text.append(page.extract_text() or "")
-        return '\n'.join(text)
+        pages = pipeline_stats.timed(iter_pdf_pages(pdf_path, page_range), 'page', pdf_path,
+                                     size=lambda page: len(page[1].encode('utf-8')))
+        pages = iter_ocr_blank_pages(pdf_path, pages, ocr_jobs)
+        for page_num, text in pages:
+            yield PageMarker(page_num)
+            yield text
     except Exception as e:
-        return f"Error extracting PDF: {e}"
+        raise ExtractionError(f"Error extracting PDF: {e}") from e
+
+def extract_pdf(pdf_path):
+    """Extract text from PDF"""
+    return '\n'.join(iter_extract_pdf(pdf_path))
 
 def extract_pptx(pptx_path):
     """Extract text from PowerPoint"""
@@ -46,7 +98,7 @@ def extract_pptx(pptx_path):
         
         return '\n'.join(text) if text else "No text found in presentation"
     except Exception as e:
-        return f"Error extracting PPTX: {e}"
+        raise ExtractionError(f"Error extracting PPTX: {e}") from e
 
 def extract_docx(docx_path):
     """Extract text from Word document"""
@@ -72,151 +124,628 @@ def extract_docx(docx_path):
         
         return '\n'.join(text) if text else "No text found in document"
     except Exception as e:
-        return f"Error extracting DOCX: {e}"
+        raise ExtractionError(f"Error extracting DOCX: {e}") from e
 
-def extract_xlsx(xlsx_path):
-    """Extract text from Excel file"""
+def iter_fast_ooxml(path, fast_parts, extractor, empty_text):
+    """Yield an OOXML extractor's output parts straight from the package XML.
+
+    fast_parts reads only the text parts of the zip. If it cannot make sense
+    of the package before producing anything, the library-based extractor
+    is used instead so unusual files still extract the same way.
+    """
+    parts = fast_parts(path)
+    try:
+        first = next(parts, None)
+    except Exception:
+        yield extractor(path)
+        return
+    if first is None:
+        yield empty_text
+        return
+    yield first
+    try:
+        yield from parts
+    except Exception as e:
+        raise ExtractionError(f"Error reading {Path(path).suffix[1:].upper()} XML: {e}") from e
+
+def iter_extract_pptx(pptx_path):
+    """Yield the parts of extract_pptx's output slide by slide without loading media"""
+    return iter_fast_ooxml(pptx_path, iter_pptx_parts, extract_pptx, "No text found in presentation")
+
+def iter_extract_docx(docx_path):
+    """Yield the parts of extract_docx's output without loading the document model or media"""
+    return iter_fast_ooxml(docx_path, iter_docx_parts, extract_docx, "No text found in document")
+
+def open_table_writer(table_folder, xlsx_path, sheet_name, table_format):
+    """Open a CSV/TSV file for one sheet; returns ``(file, csv_writer)``"""
+    safe_sheet = re.sub(r'[^\w\-. ]', '_', sheet_name)
+    table_path = Path(table_folder) / f"{Path(xlsx_path).stem}_{safe_sheet}.{table_format}"
+    table_file = open(table_path, 'w', encoding='utf-8', newline='')
+    dialect = 'excel-tab' if table_format == 'tsv' else 'excel'
+    return table_file, csv.writer(table_file, dialect=dialect)
+
+def iter_extract_xlsx(xlsx_path, table_format=None, table_folder=None):
+    """Yield the parts of extract_xlsx's output row by row.
+    
+    The workbook is opened in read-only mode so rows are streamed from the
+    file instead of building the whole object model first. With a
+    table_format of 'tsv' or 'csv', each sheet's rows are also written to
+    ``<stem>_<sheet>.<format>`` in table_folder in the same pass.
+    """
     try:
         from openpyxl import load_workbook
-        wb = load_workbook(xlsx_path)
-        text = []
-        
-        for sheet_name in wb.sheetnames:
-            text.append(f"\n--- Sheet: {sheet_name} ---\n")
-            ws = wb[sheet_name]
-            
-            for row in ws.iter_rows(values_only=True):
-                row_text = []
-                for cell in row:
-                    if cell is not None:
-                        row_text.append(str(cell))
-                if any(row_text):
-                    text.append(" | ".join(row_text))
-        
-        return '\n'.join(text) if text else "No data found in spreadsheet"
+        wb = load_workbook(xlsx_path, read_only=True)
+        found = False
+        try:
+            for sheet_name in wb.sheetnames:
+                found = True
+                yield f"\n--- Sheet: {sheet_name} ---\n"
+                ws = wb[sheet_name]
+                if not hasattr(ws, 'iter_rows'):
+                    continue
+                # Don't trust the stored dimensions, which are often stale
+                ws.reset_dimensions()
+                
+                table_file = None
+                if table_format:
+                    table_file, table = open_table_writer(table_folder, xlsx_path, sheet_name, table_format)
+                try:
+                    for row in ws.iter_rows(values_only=True):
+                        row_text = []
+                        for cell in row:
+                            if cell is not None:
+                                row_text.append(str(cell))
+                        if any(row_text):
+                            yield " | ".join(row_text)
+                            if table_file is not None:
+                                table.writerow(['' if cell is None else cell for cell in row])
+                finally:
+                    if table_file is not None:
+                        table_file.close()
+        finally:
+            wb.close()
+        if not found:
+            yield "No data found in spreadsheet"
     except Exception as e:
-        return f"Error extracting XLSX: {e}"
+        raise ExtractionError(f"Error extracting XLSX: {e}") from e
 
-def extract_audio(audio_path):
-    """Extract text from audio file (requires transcription)"""
+def extract_xlsx(xlsx_path):
+    """Extract text from Excel file"""
+    return '\n'.join(iter_extract_xlsx(xlsx_path))
+
+def find_quiet_split(samples, search_samples, frame=AUDIO_SAMPLE_RATE // 50):
+    """Return the index of the quietest 20 ms frame in the last search_samples of a chunk"""
+    import numpy as np
+    tail = samples[-search_samples:]
+    frames = len(tail) // frame
+    if frames < 2:
+        return len(samples)
+    energy = np.abs(tail[:frames * frame].astype(np.int32)).reshape(frames, frame).mean(axis=1)
+    return len(samples) - len(tail) + int(energy.argmin()) * frame + frame // 2
+
+def iter_audio_chunks(audio_path, chunk_sec=AUDIO_CHUNK_SEC, split_on_silence=True):
+    """Decode audio with ffmpeg into 16 kHz mono float32 chunks, entirely in memory.
+    
+    Only one chunk is held at a time. With split_on_silence, each chunk is
+    cut at the quietest point of its last few seconds so words are not
+    split between chunks; the remainder is carried into the next chunk.
+    """
+    import numpy as np
+    cmd = ['ffmpeg', '-nostdin', '-v', 'error', '-i', str(audio_path),
+           '-f', 's16le', '-ac', '1', '-ar', str(AUDIO_SAMPLE_RATE), '-']
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    chunk_samples = AUDIO_SAMPLE_RATE * chunk_sec
+    carry = np.zeros(0, dtype=np.int16)
+    finished = False
     try:
-        import speech_recognition as sr
-        from pydub import AudioSegment
-        
-        # Convert audio to WAV if needed
-        audio = AudioSegment.from_file(audio_path)
-        wav_path = audio_path.with_suffix('.wav')
-        audio.export(wav_path, format="wav")
-        
-        # Transcribe
-        r = sr.Recognizer()
-        with sr.AudioFile(str(wav_path)) as source:
-            audio_data = r.record(source)
-            text = r.recognize_google(audio_data)
-        
-        # Clean up temp file
-        wav_path.unlink()
-        return text
+        while True:
+            wanted = (chunk_samples - len(carry)) * 2
+            data = proc.stdout.read(wanted)
+            samples = np.concatenate([carry, np.frombuffer(data, dtype=np.int16)])
+            if len(data) < wanted:
+                finished = True
+                if len(samples):
+                    yield samples.astype(np.float32) / 32768.0
+                break
+            cut = len(samples)
+            if split_on_silence:
+                cut = find_quiet_split(samples, AUDIO_SAMPLE_RATE * SILENCE_SEARCH_SEC)
+            yield samples[:cut].astype(np.float32) / 32768.0
+            carry = samples[cut:]
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        error = proc.stderr.read().decode('utf-8', 'ignore').strip()
+        proc.stderr.close()
+        if proc.wait() != 0 and finished:
+            raise RuntimeError(f"ffmpeg failed: {error or proc.returncode}")
+
+_whisper_model = None
+
+def whisper_model():
+    """Load the local faster-whisper model once per process"""
+    global _whisper_model
+    if _whisper_model is None:
+        from faster_whisper import WhisperModel
+        _whisper_model = WhisperModel(WHISPER_MODEL, device="auto", compute_type="auto")
+    return _whisper_model
+
+def iter_extract_audio(audio_path):
+    """Yield transcribed text chunk by chunk using a local faster-whisper model"""
+    try:
+        model = whisper_model()
+        found = False
+        chunks = pipeline_stats.timed(iter_audio_chunks(audio_path), 'decode', audio_path,
+                                      size=lambda chunk: chunk.nbytes, pages=0)
+        for chunk in chunks:
+            with pipeline_stats.stage('transcribe', audio_path, nbytes=chunk.nbytes):
+                segments, _ = model.transcribe(chunk, vad_filter=True, beam_size=5)
+                text = " ".join(seg.text.strip() for seg in segments).strip()
+            if text:
+                found = True
+                yield text
+        if not found:
+            yield "No speech found in audio"
     except Exception as e:
-        return f"Error transcribing audio: {e}\nNote: Audio transcription requires internet connection and may have limitations."
+        raise ExtractionError(f"Error transcribing audio: {e}\nNote: Offline transcription requires ffmpeg and faster-whisper: brew install ffmpeg && pip3 install faster-whisper") from e
 
-def extract_image(image_path):
-    """Extract text from image using OCR"""
+def extract_audio(audio_path):
+    """Extract text from audio file (transcribed offline, 30 s at a time)"""
+    return '\n'.join(iter_extract_audio(audio_path))
+
+def extract_image(image_path, ocr_jobs=1):
+    """Extract text from image using OCR, one section per frame of multi-page TIFFs and GIFs"""
     try:
-        from PIL import Image
-        import pytesseract
-        
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
+        frames = ocr_image(image_path, ocr_jobs)
+        if len(frames) == 1:
+            text = frames[0]
+        else:
+            text = []
+            for frame_num, frame_text in enumerate(frames):
+                text.append(f"\n--- Frame {frame_num + 1} ---\n")
+                text.append(frame_text)
+            text = '\n'.join(text)
         return text if text.strip() else "No text found in image"
     except Exception as e:
-        return f"Error extracting text from image: {e}\nNote: Requires Tesseract OCR to be installed: brew install tesseract"
+        raise ExtractionError(f"Error extracting text from image: {e}\nNote: Requires Tesseract OCR to be installed: brew install tesseract") from e
+
+EXTRACTORS = {
+    '.pdf': extract_pdf,
+    '.pptx': extract_pptx,
+    '.docx': extract_docx,
+    '.xlsx': extract_xlsx,
+    '.mp3': extract_audio,
+    '.m4a': extract_audio,
+    '.wav': extract_audio,
+    '.png': extract_image,
+    '.jpg': extract_image,
+    '.jpeg': extract_image,
+    '.gif': extract_image,
+    '.tiff': extract_image,
+}
+
+# Bump an extractor's version whenever its output changes so stale
+# cache entries are no longer used
+EXTRACTOR_VERSIONS = {
+    'extract_pdf': 2,
+    'extract_pptx': 1,
+    'extract_docx': 1,
+    'extract_xlsx': 1,
+    'extract_audio': 2,
+    'extract_image': 2,
+}
+
+# Extractors that can also yield their output part by part; the parts are
+# joined with newlines exactly as the non-streaming extractor joins them
+STREAMING_EXTRACTORS = {
+    extract_pdf: iter_extract_pdf,
+    extract_pptx: iter_extract_pptx,
+    extract_docx: iter_extract_docx,
+    extract_xlsx: iter_extract_xlsx,
+    extract_audio: iter_extract_audio,
+}
+
+# Extractors that run Tesseract and accept an ocr_jobs argument
+OCR_EXTRACTORS = {extract_pdf, extract_image}
+
+# Extractors that can also write TSV/CSV tables via table_format/table_folder
+TABLE_EXTRACTORS = {extract_xlsx}
+TABLE_FORMATS = ('tsv', 'csv')
 
 def extract_file(file_path):
     """Extract text from any supported file type"""
     file_path = Path(file_path)
     suffix = file_path.suffix.lower()
     
-    extractors = {
-        '.pdf': extract_pdf,
-        '.pptx': extract_pptx,
-        '.docx': extract_docx,
-        '.xlsx': extract_xlsx,
-        '.mp3': extract_audio,
-        '.m4a': extract_audio,
-        '.wav': extract_audio,
-        '.png': extract_image,
-        '.jpg': extract_image,
-        '.jpeg': extract_image,
-        '.gif': extract_image,
-        '.tiff': extract_image,
-    }
-    
-    if suffix not in extractors:
+    if suffix not in EXTRACTORS:
         return None
     
     print(f"Extracting text from {file_path.name}...")
-    return extractors[suffix](file_path)
+    return EXTRACTORS[suffix](file_path)
+
+def describe_range(page_range):
+    """Return a 1-based 'pages A-B' label for a range of page indexes"""
+    return f"pages {page_range.start + 1}-{page_range.stop}"
+
+def iter_extract_file(file_path, page_range=None, ocr_jobs=1, tables=None):
+    """Like extract_file, but return an iterator of text parts.
+
+    Streaming extractors produce one part per page so the whole document
+    is never held in memory; the rest yield their full text as one part.
+    page_range restricts PDFs to a range of 0-based page indexes, and
+    ocr_jobs is the number of Tesseract processes OCR extractors may use,
+    and tables is an optional ``(format, folder)`` for spreadsheet tables.
+    """
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+    
+    if suffix not in EXTRACTORS:
+        return None
+    
+    extractor = EXTRACTORS[suffix]
+    kwargs = {'ocr_jobs': ocr_jobs} if extractor in OCR_EXTRACTORS else {}
+    if tables and extractor in TABLE_EXTRACTORS:
+        kwargs['table_format'], kwargs['table_folder'] = tables
+    if page_range is not None:
+        print(f"Extracting text from {file_path.name} ({describe_range(page_range)})...")
+        return join_parts(STREAMING_EXTRACTORS[extractor](file_path, page_range, **kwargs))
+    print(f"Extracting text from {file_path.name}...")
+    if extractor in STREAMING_EXTRACTORS:
+        return join_parts(STREAMING_EXTRACTORS[extractor](file_path, **kwargs))
+    return iter([extractor(file_path, **kwargs)])
+
+def extractor_version(file_path):
+    """Return ``(extractor_name, version)`` for a file, or ``(None, None)`` if it is unsupported"""
+    extractor = EXTRACTORS.get(Path(file_path).suffix.lower())
+    if extractor is None:
+        return None, None
+    return extractor.__name__, EXTRACTOR_VERSIONS[extractor.__name__]
+
+def cache_key(file_path, page_range=None):
+    """Return ``(sha256, extractor_name, version)`` for a supported file"""
+    extractor, version = extractor_version(file_path)
+    if page_range is not None:
+        extractor = f"{extractor}[{page_range.start + 1}-{page_range.stop}]"
+    return file_sha256(file_path), extractor, version
+
+def extract_file_job(file_path, body_path, page_range=None, ocr_jobs=1, tables=None):
+    """Stream the text of file_path into body_path, typically in a worker process.
+
+    Returns ``(file_path, body_path, error)``; body_path is None when the
+    file failed (error is set) or is unsupported (error is None).
+    """
+    try:
+        parts = iter_extract_file(file_path, page_range, ocr_jobs, tables)
+        if parts is None:
+            return file_path, None, None
+        with pipeline_stats.stage('extract', file_path, nbytes=Path(file_path).stat().st_size):
+            written = write_parts(body_path, parts)
+        if written == 0:
+            error = "No text extracted"
+        else:
+            return file_path, body_path, None
+    except ExtractionError as e:
+        error = str(e)
+    except Exception as e:
+        error = f"Unexpected error: {e}"
+    if Path(body_path).exists():
+        Path(body_path).unlink()
+    return file_path, None, error
+
+def find_supported_files(folder='.'):
+    """Find all supported files in a folder"""
+    files = []
+    for ext in SUPPORTED_EXTENSIONS:
+        files.extend(Path(folder).glob(f'*{ext}'))
+        files.extend(Path(folder).glob(f'*{ext.upper()}'))
+    return files
+
+def output_path_for(file_path, output_folder):
+    """Return the *_extracted.txt path for a source file"""
+    return output_folder / f"{file_path.stem}_extracted.txt"
+
+def pdf_page_ranges(file_path, jobs, page_range=None):
+    """Return the page ranges a large PDF should be split into, or None to extract it whole"""
+    if file_path.suffix.lower() != '.pdf':
+        return None
+    if page_range is None:
+        count = count_pages(file_path)
+        if count is None:
+            return None
+        page_range = range(count)
+    if len(page_range) < PARALLEL_MIN_PAGES:
+        return None
+    return split_page_range(page_range, jobs)
+
+def merge_range_bodies(body_path, part_paths):
+    """Concatenate per-range body files in page order, joined like the page parts themselves"""
+    with open(body_path, 'w', encoding='utf-8') as out:
+        for i, part_path in enumerate(part_paths):
+            if i:
+                out.write('\n')
+            with open(part_path, 'r', encoding='utf-8') as part:
+                shutil.copyfileobj(part, out)
+    for part_path in part_paths:
+        Path(part_path).unlink()
+
+def job_result(future, file_path, body_path):
+    """Return a finished extract_file_job future's result, turning a killed worker into a failure"""
+    try:
+        return pipeline_stats.result(future)
+    except (WorkerTimeout, WorkerDied) as e:
+        if Path(body_path).exists():
+            Path(body_path).unlink()
+        return file_path, None, str(e)
+
+def iter_extracted(items, jobs=1, page_range=None, tables=None, timeout=None, memory_mb=None):
+    """Yield ``(file_path, body_path, error)`` for each ``(file_path, body_path)`` item as extraction finishes.
+
+    Each file's text is streamed into its temporary body file. With
+    ``jobs > 1`` files are fanned out over a process pool and results arrive
+    in completion order rather than input order; PDFs with many pages are
+    split into page ranges that run as separate tasks in the same pool and
+    are stitched back together in page order. With a timeout (seconds) or
+    memory_mb limit every task runs in a sandboxed worker, and a task that
+    overruns either is killed and reported as failed.
+    """
+    sandboxed = bool(timeout or memory_mb)
+    if jobs <= 1 and not sandboxed:
+        for file_path, body_path in items:
+            yield extract_file_job(file_path, body_path, page_range, tables=tables)
+        return
+    
+    # A lone file that is not split by page gives its cores to OCR instead
+    ocr_jobs = jobs if len(items) == 1 else 1
+    if len(items) == 1 and not sandboxed:
+        file_path, body_path = items[0]
+        if pdf_page_ranges(file_path, jobs, page_range) is None:
+            yield extract_file_job(file_path, body_path, page_range, ocr_jobs, tables)
+            return
+
+    if sandboxed:
+        executor = SandboxExecutor(jobs, timeout, memory_mb)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    with executor as pool:
+        futures = {}
+        split_files = {}
+        for file_path, body_path in items:
+            ranges = pdf_page_ranges(file_path, jobs, page_range) if jobs > 1 else None
+            if ranges is None:
+                future = pipeline_stats.submit(pool, extract_file_job, file_path, body_path, page_range, ocr_jobs, tables)
+                futures[future] = (file_path, body_path, False)
+                continue
+            part_paths = [body_path.with_name(f"{body_path.name}.{i}") for i in range(len(ranges))]
+            split_files[file_path] = {'body': body_path, 'parts': part_paths,
+                                      'remaining': len(ranges), 'error': None}
+            for chunk, part_path in zip(ranges, part_paths):
+                future = pipeline_stats.submit(pool, extract_file_job, file_path, part_path, chunk)
+                futures[future] = (file_path, part_path, True)
+        
+        for future in as_completed(futures):
+            file_path, path, is_part = futures[future]
+            result = job_result(future, file_path, path)
+            if not is_part:
+                yield result
+                continue
+            state = split_files[file_path]
+            state['error'] = state['error'] or result[2]
+            state['remaining'] -= 1
+            if state['remaining']:
+                continue
+            if state['error']:
+                for path in state['parts']:
+                    if path.exists():
+                        path.unlink()
+                yield file_path, None, state['error']
+            else:
+                merge_range_bodies(state['body'], state['parts'])
+                yield file_path, state['body'], None
+
+def extract_all(files, output_folder, jobs=1, cache=None, manifest=None, table_format=None,
+                timeout=None, memory_mb=None):
+    """Extract every file into output_folder, writing results from this process.
+
+    With a cache, byte-identical files are extracted once per run and files
+    already seen by an earlier run are served from the cache. With a
+    manifest, files unchanged since their output was written are skipped.
+    With a table_format, spreadsheets are always re-read so their TSV/CSV
+    tables are written next to the text output. timeout and memory_mb
+    sandbox each extraction as described in iter_extracted, so a file that
+    hangs or blows up is recorded as failed while the batch moves on.
+    Returns ``(success_count, skipped_count, failed)``.
+    """
+    success_count = 0
+    skipped_count = 0
+    failed = []
+    keys = {}
+    duplicates = {}
+    pending = []
+    
+    def write_output(file_path, body_path, key=None, note=""):
+        nonlocal success_count
+        output_file = output_path_for(file_path, output_folder)
+        try:
+            publish_extracted(output_file, file_path.name, body_path)
+            print(f"✓ {file_path.name} -> {output_file.name}{note}")
+            success_count += 1
+        except Exception as e:
+            print(f"✗ Error writing {file_path.name}: {e}")
+            failed.append(file_path)
+            return
+        if manifest is not None:
+            manifest.record(file_path, output_file, key[0] if key else None, *extractor_version(file_path))
+    
+    for file_path in files:
+        if table_format and EXTRACTORS.get(file_path.suffix.lower()) in TABLE_EXTRACTORS:
+            pending.append(file_path)
+            continue
+        if manifest is not None and manifest.is_current(file_path, output_path_for(file_path, output_folder),
+                                                        *extractor_version(file_path)):
+            skipped_count += 1
+            continue
+        if cache is None or file_path.suffix.lower() not in EXTRACTORS:
+            pending.append(file_path)
+            continue
+        key = cache_key(file_path)
+        if key in duplicates:
+            duplicates[key].append(file_path)
+            continue
+        cached_path = cache.lookup(*key)
+        if cached_path is not None:
+            write_output(file_path, cached_path, key, " (cached)")
+            continue
+        keys[file_path] = key
+        duplicates[key] = []
+        pending.append(file_path)
+    
+    if skipped_count:
+        print(f"Skipping {skipped_count} unchanged file(s)")
+    
+    # Start the biggest files first so a large document is not left running
+    # on its own at the end of the batch
+    if jobs > 1:
+        pending.sort(key=lambda path: path.stat().st_size, reverse=True)
+    items = [(file_path, spool_path_for(output_path_for(file_path, output_folder))) for file_path in pending]
+    
+    tables = (table_format, output_folder) if table_format else None
+    for file_path, body_path, error in iter_extracted(items, jobs, tables=tables, timeout=timeout, memory_mb=memory_mb):
+        key = keys.get(file_path)
+        copies = duplicates.get(key, [])
+        if error:
+            for path in [file_path] + copies:
+                print(f"✗ {path.name}: {error}")
+                failed.append(path)
+        elif body_path:
+            if key is not None:
+                body_path = cache.store(*key, body_path)
+            write_output(file_path, body_path, key)
+            for path in copies:
+                write_output(path, body_path, key, f" (duplicate of {file_path.name})")
+            if key is None:
+                Path(body_path).unlink()
+        else:
+            print(f"✗ Unsupported format: {file_path.name}")
+    
+    return success_count, skipped_count, failed
+
+def extract_single(file_path, output_path, cache=None, jobs=1, pages=None, table_format=None,
+                   timeout=None, memory_mb=None):
+    """Extract one file to output_path, streaming through the cache if given.
+    
+    Large PDFs are split into page ranges across jobs worker processes, and
+    pages is an optional 1-based spec like '5-10' to extract only a slice.
+    timeout and memory_mb limit the extraction as described in iter_extracted.
+    """
+    page_range = None
+    if pages:
+        if file_path.suffix.lower() != '.pdf':
+            print(f"✗ --pages only applies to PDFs: {file_path.name}")
+            return False
+        count = count_pages(file_path)
+        if count is None:
+            print(f"✗ Could not count pages in {file_path.name}")
+            return False
+        page_range = parse_pages(pages, count)
+    
+    key = None
+    body_path = None
+    tables = (table_format, output_path.parent) if table_format else None
+    if cache is not None and file_path.suffix.lower() in EXTRACTORS:
+        key = cache_key(file_path, page_range)
+        if not (tables and EXTRACTORS[file_path.suffix.lower()] in TABLE_EXTRACTORS):
+            body_path = cache.lookup(*key)
+    if body_path is None:
+        items = [(file_path, spool_path_for(output_path))]
+        _, body_path, error = next(iter_extracted(items, jobs, page_range, tables, timeout, memory_mb))
+        if error:
+            print(f"✗ {file_path.name}: {error}")
+            return False
+        if body_path is None:
+            print(f"✗ Unsupported file format: {file_path.name}")
+            return False
+        if key is not None:
+            body_path = cache.store(*key, body_path)
+    
+    publish_extracted(output_path, file_path.name, body_path)
+    if key is None:
+        Path(body_path).unlink()
+    print(f"✓ Extracted: {file_path.name} -> {output_path.name}")
+    return True
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python3 extract_all_files.py <file> [output_file]")
-        print("   or: python3 extract_all_files.py --all [output_folder]")
+    args = sys.argv[1:]
+    jobs = pop_option(args, '--jobs', 1, job_count)
+    pages = pop_option(args, '--pages')
+    table_format = pop_option(args, '--tables')
+    timeout = pop_option(args, '--timeout', None, float)
+    memory_mb = pop_option(args, '--max-memory', None, int)
+    stats_path = pop_option(args, '--stats')
+    if table_format not in (None,) + TABLE_FORMATS:
+        print(f"Error: --tables must be one of: {', '.join(TABLE_FORMATS)}")
+        sys.exit(1)
+    cache = None if pop_flag(args, '--no-cache') else ExtractionCache()
+    
+    if not args:
+        print("Usage: python3 extract_all_files.py <file> [output_file] [--pages 5-10]")
+        print("   or: python3 extract_all_files.py --all [output_folder] [--jobs N]")
+        print("\nOptions:")
+        print("  --jobs N           Extract N files in parallel (0 = one per CPU core);")
+        print(f"                     PDFs of {PARALLEL_MIN_PAGES}+ pages are also split into page ranges")
+        print("  --pages R          Only extract pages R of a single PDF, e.g. 5, 5-10, 5- or -10")
+        print("  --tables tsv|csv   Also write each spreadsheet sheet as <name>_<sheet>.tsv/.csv")
+        print("  --no-cache         Re-extract everything instead of using .extraction_cache/")
+        print("  --timeout SEC      Kill and fail any file (or PDF page range) still running after SEC seconds")
+        print("  --max-memory MB    Cap each extraction worker's address space at MB megabytes")
+        print("  --stats FILE       Time each stage per file and write p50/p95 summary to FILE (.json or .csv)")
         print("\nSupported formats:")
         print("  PDF, PPTX, DOCX, XLSX, MP3, M4A, WAV, PNG, JPG, GIF, TIFF")
         sys.exit(1)
     
-    if sys.argv[1] == '--all':
-        output_folder = Path(sys.argv[2]) if len(sys.argv) > 2 else Path('extracted_text')
+    if stats_path:
+        pipeline_stats.enable(stats_path)
+    
+    if args[0] == '--all':
+        if pages:
+            print("Error: --pages only applies to a single file")
+            sys.exit(1)
+        output_folder = Path(args[1]) if len(args) > 1 else Path('extracted_text')
         output_folder.mkdir(exist_ok=True)
         
         # Find all supported files
-        extensions = ['.pdf', '.pptx', '.docx', '.xlsx', '.mp3', '.m4a', '.wav', 
-                     '.png', '.jpg', '.jpeg', '.gif', '.tiff']
-        files = []
-        for ext in extensions:
-            files.extend(Path('.').glob(f'*{ext}'))
-            files.extend(Path('.').glob(f'*{ext.upper()}'))
+        files = find_supported_files()
+        
+        # Drop outputs whose sources have been deleted since the last run
+        manifest = Manifest(output_folder / MANIFEST_NAME)
+        for output_file in manifest.prune(files):
+            print(f"✗ Removed {output_file.name} (source is gone)")
         
         if not files:
+            manifest.save()
             print("No supported files found")
             return
         
-        print(f"Found {len(files)} file(s). Extracting...\n")
-        success_count = 0
+        print(f"Found {len(files)} file(s). Extracting with {jobs} job(s)...\n")
+        success_count, skipped_count, failed = extract_all(files, output_folder, jobs, cache, manifest, table_format,
+                                                           timeout, memory_mb)
+        manifest.save()
         
-        for file_path in files:
-            text = extract_file(file_path)
-            if text:
-                output_file = output_folder / f"{file_path.stem}_extracted.txt"
-                try:
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(f"Extracted from: {file_path.name}\n")
-                        f.write("=" * 80 + "\n\n")
-                        f.write(text)
-                    print(f"✓ {file_path.name} -> {output_file.name}")
-                    success_count += 1
-                except Exception as e:
-                    print(f"✗ Error writing {file_path.name}: {e}")
-            else:
-                print(f"✗ Unsupported format: {file_path.name}")
-        
-        print(f"\n✓ Successfully extracted {success_count}/{len(files)} file(s)")
+        print(f"\n✓ Successfully extracted {success_count}/{len(files) - skipped_count} changed file(s)")
+        if skipped_count:
+            print(f"  {skipped_count} file(s) already up to date")
+        if failed:
+            print(f"✗ Failed: {len(failed)} file(s)")
+            for file_path in failed:
+                print(f"  - {file_path.name}")
     else:
         # Extract single file
-        file_path = Path(sys.argv[1])
-        output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else file_path.with_suffix('.txt')
+        file_path = Path(args[0])
+        output_path = Path(args[1]) if len(args) > 1 else file_path.with_suffix('.txt')
         
-        text = extract_file(file_path)
-        if text:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(f"Extracted from: {file_path.name}\n")
-                f.write("=" * 80 + "\n\n")
-                f.write(text)
-            print(f"✓ Extracted: {file_path.name} -> {output_path.name}")
-        else:
-            print(f"✗ Unsupported file format: {file_path.name}")
+        if not extract_single(file_path, output_path, cache, jobs, pages, table_format, timeout, memory_mb):
+            sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Extract and Format for Printing
+Streams extracted text straight into the print formatter, page by page, so a
+file's printable copy is written while it is still being extracted and no
+intermediate *_extracted.txt has to be written and read back. PDF page
+boundaries are passed through as real page breaks
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from itertools import chain
+from pathlib import Path
+
+import pipeline_stats
+from cli_options import pop_option, job_count
+from extract_all_files import (ExtractionError, extractor_version, find_supported_files, iter_extract_file,
+                               output_path_for)
+from extraction_io import PageMarker, extracted_header, hidden_temp_path, join_parts
+from extraction_manifest import Manifest
+from format_for_print import PAGE_BREAK, PrintFormatter
+
+MANIFEST_NAME = '.print_manifest.json'
+
+
+def formatted_path_for(file_path, output_folder):
+    """Return the *_formatted.txt path for a source file"""
+    return output_folder / f"{file_path.stem}_formatted.txt"
+
+
+def iter_part_lines(parts):
+    """Stream-equivalent of ``''.join(parts).split('\\n')``, with PageMarker lines as PAGE_BREAK"""
+    pending = []
+    for part in parts:
+        if isinstance(part, PageMarker):
+            yield ''.join(pending)
+            yield PAGE_BREAK
+            pending = []
+            continue
+        lines = part.split('\n')
+        if len(lines) == 1:
+            pending.append(part)
+            continue
+        pending.append(lines[0])
+        yield ''.join(pending)
+        yield from lines[1:-1]
+        pending = [lines[-1]]
+    yield ''.join(pending)
+
+
+def count_chars(parts, counter):
+    """Pass parts through, adding their length to counter['chars']"""
+    for part in parts:
+        counter['chars'] += len(part)
+        yield part
+
+
+def tee_parts(parts, f):
+    """Pass parts through, also writing each one to f"""
+    for part in parts:
+        f.write(part)
+        yield part
+
+
+def extract_format_job(file_path, formatted_path, formatter, raw_path=None):
+    """Extract file_path and write its print-formatted copy, typically in a worker process.
+
+    The extractor's parts go straight into the formatter and each page is
+    written as soon as it is finished; with raw_path the extracted text is
+    also written there, exactly as extract_all_files.py would write it.
+    Returns ``(file_path, error)``; error is None on success.
+    """
+    tmp_paths = [hidden_temp_path(formatted_path, 'part')]
+    if raw_path is not None:
+        tmp_paths.append(hidden_temp_path(raw_path, 'part'))
+    try:
+        body = iter_extract_file(file_path)
+        if body is None:
+            return file_path, "Unsupported format"
+        counter = {'chars': 0}
+        with pipeline_stats.stage('pipeline', file_path, nbytes=Path(file_path).stat().st_size), ExitStack() as files:
+            out = files.enter_context(open(tmp_paths[0], 'w', encoding='utf-8'))
+            parts = chain([extracted_header(file_path.name)], count_chars(body, counter))
+            if raw_path is not None:
+                parts = tee_parts(parts, files.enter_context(open(tmp_paths[1], 'w', encoding='utf-8')))
+            pages = formatter.iter_pages(iter_part_lines(parts), file_path.stem, text_markers=False)
+            for part in join_parts('\n'.join(page) for page in pages):
+                out.write(part)
+        if counter['chars'] == 0:
+            return file_path, "No text extracted"
+        os.replace(tmp_paths[0], formatted_path)
+        if raw_path is not None:
+            os.replace(tmp_paths[1], raw_path)
+        return file_path, None
+    except ExtractionError as e:
+        return file_path, str(e)
+    except Exception as e:
+        return file_path, f"Unexpected error: {e}"
+    finally:
+        for tmp_path in tmp_paths:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+
+def extract_format_all(files, output_folder, formatter, jobs=1, raw_folder=None, manifest=None):
+    """Extract and format every file into output_folder, across jobs processes when jobs > 1.
+
+    With a manifest, files unchanged since their formatted copy was written
+    are skipped. Returns ``(success_count, skipped_count, failed)``.
+    """
+    success_count = 0
+    skipped_count = 0
+    failed = []
+    pending = []
+    for file_path in files:
+        formatted_path = formatted_path_for(file_path, output_folder)
+        if manifest is not None and manifest.is_current(file_path, formatted_path, *extractor_version(file_path)):
+            skipped_count += 1
+            continue
+        raw_path = output_path_for(file_path, raw_folder) if raw_folder else None
+        pending.append((file_path, formatted_path, raw_path))
+
+    if skipped_count:
+        print(f"Skipping {skipped_count} unchanged file(s)")
+
+    def finished(file_path, formatted_path, error):
+        nonlocal success_count
+        if error:
+            print(f"✗ {file_path.name}: {error}")
+            failed.append(file_path)
+            return
+        print(f"✓ {file_path.name} -> {formatted_path.name}")
+        success_count += 1
+        if manifest is not None:
+            manifest.record(file_path, formatted_path, None, *extractor_version(file_path))
+
+    if jobs <= 1 or len(pending) <= 1:
+        for file_path, formatted_path, raw_path in pending:
+            _, error = extract_format_job(file_path, formatted_path, formatter, raw_path)
+            finished(file_path, formatted_path, error)
+        return success_count, skipped_count, failed
+
+    # Start the biggest files first so a large document is not left running
+    # on its own at the end of the batch
+    pending.sort(key=lambda item: item[0].stat().st_size, reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pipeline_stats.submit(pool, extract_format_job, file_path, formatted_path, formatter, raw_path):
+                   (file_path, formatted_path) for file_path, formatted_path, raw_path in pending}
+        for future in as_completed(futures):
+            file_path, formatted_path = futures[future]
+            try:
+                _, error = pipeline_stats.result(future)
+            except Exception as e:
+                error = f"Unexpected error: {e}"
+            finished(file_path, formatted_path, error)
+    return success_count, skipped_count, failed
+
+
+def main():
+    """Main function"""
+    args = sys.argv[1:]
+    jobs = pop_option(args, '--jobs', 1, job_count)
+    raw_folder = pop_option(args, '--raw')
+    stats_path = pop_option(args, '--stats')
+
+    if not args:
+        print("Usage: python3 extract_for_print.py <file> [formatted_output]")
+        print("   or: python3 extract_for_print.py --all [output_folder] [--jobs N]")
+        print("\nExtracts text and formats it for printing in one pass, without")
+        print("writing the intermediate *_extracted.txt files.")
+        print("\nOptions:")
+        print("  --all              Extract and format all supported files in current directory,")
+        print("                     skipping files unchanged since their last run")
+        print("  --jobs N           Process N files in parallel (0 = one per CPU core)")
+        print("  --raw <folder>     Also write the raw *_extracted.txt files to this folder")
+        print("  --stats FILE       Time each stage per file and write p50/p95 summary to FILE (.json or .csv)")
+        sys.exit(1)
+
+    if stats_path:
+        pipeline_stats.enable(stats_path)
+
+    formatter = PrintFormatter()
+    raw_folder = Path(raw_folder) if raw_folder else None
+    if raw_folder:
+        raw_folder.mkdir(exist_ok=True)
+
+    if args[0] == '--all':
+        output_folder = Path(args[1]) if len(args) > 1 else Path('printed_format')
+        output_folder.mkdir(exist_ok=True)
+
+        files = find_supported_files()
+
+        # Drop formatted copies whose sources have been deleted since the last run
+        manifest = Manifest(output_folder / MANIFEST_NAME)
+        for output_file in manifest.prune(files):
+            print(f"✗ Removed {output_file.name} (source is gone)")
+
+        if not files:
+            manifest.save()
+            print("No supported files found")
+            return
+
+        print(f"Found {len(files)} file(s). Extracting and formatting with {jobs} job(s)...\n")
+        success_count, skipped_count, failed = extract_format_all(files, output_folder, formatter, jobs,
+                                                                  raw_folder, manifest)
+        manifest.save()
+
+        print(f"\n✓ Successfully processed {success_count}/{len(files) - skipped_count} changed file(s)")
+        if skipped_count:
+            print(f"  {skipped_count} file(s) already up to date")
+        if failed:
+            print(f"✗ Failed: {len(failed)} file(s)")
+            for file_path in failed:
+                print(f"  - {file_path.name}")
+        print(f"  Output folder: {output_folder.absolute()}")
+    else:
+        file_path = Path(args[0])
+        if len(args) > 1:
+            formatted_path = Path(args[1])
+        else:
+            output_folder = Path('printed_format')
+            output_folder.mkdir(exist_ok=True)
+            formatted_path = formatted_path_for(file_path, output_folder)
+        raw_path = output_path_for(file_path, raw_folder) if raw_folder else None
+
+        _, error = extract_format_job(file_path, formatted_path, formatter, raw_path)
+        if error:
+            print(f"✗ {file_path.name}: {error}")
+            sys.exit(1)
+        print(f"✓ {file_path.name} -> {formatted_path.name}")
+
+if __name__ == '__main__':
+    main()
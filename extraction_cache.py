@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Extraction Result Cache
+Persistent, size-bounded cache of extracted text keyed by the SHA-256 of the
+input file plus the extractor name and version, so byte-identical inputs are
+only ever parsed once
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+import pipeline_stats
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('EXTRACTION_CACHE_DIR', '.extraction_cache'))
+DEFAULT_MAX_MB = int(os.environ.get('EXTRACTION_CACHE_MB', '512'))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks without reading it into memory"""
+    digest = hashlib.sha256()
+    with pipeline_stats.stage('hash', path) as counter, open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+            counter.bytes += len(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """On-disk LRU cache of extracted text.
+
+    Entries are plain files (UTF-8 text by default) named after the cache
+    key. A hit bumps the entry's mtime, and once the cache grows past
+    ``max_bytes`` the entries with the oldest mtime are evicted first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, suffix='.txt'):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+
+    def _path(self, file_hash, extractor, version):
+        key = hashlib.sha256(f"{file_hash}:{extractor}:{version}".encode()).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def lookup(self, file_hash, extractor, version):
+        """Return the path of the cached entry, or None on a miss.
+
+        Entries are returned as paths so callers can stream them instead of
+        loading the text into memory.
+        """
+        path = self._path(file_hash, extractor, version)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def store(self, file_hash, extractor, version, src_path):
+        """Move the file at src_path into the cache and return its new path.
+
+        Least recently used entries are evicted if the cache is over its size limit.
+        """
+        path = self._path(file_hash, extractor, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        shutil.move(str(src_path), str(tmp_path))
+        os.replace(tmp_path, path)
+        if self._total_bytes is not None:
+            self._total_bytes += path.stat().st_size - old_size
+        self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        """List (mtime, size, path) for every cache entry"""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(self.suffix):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+        return entries
+
+    def _evict(self, keep=None):
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+        for _, size, path in sorted(self._entries()):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+                self._total_bytes -= size
+            except OSError:
+                pass
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Streaming Extraction Output
+Helpers for writing extracted text part by part so that large documents
+never have to be held in memory as a single string
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+import pipeline_stats
+
+
+class PageMarker(str):
+    """The ``--- Page N ---`` part streamed before each page of a PDF.
+
+    It is written out like any other text part, but streaming consumers
+    can recognise it as a real page boundary without parsing the text.
+    """
+
+    def __new__(cls, page_num):
+        marker = super().__new__(cls, f"\n--- Page {page_num} ---\n")
+        marker.page_num = page_num
+        return marker
+
+    def __getnewargs__(self):
+        return (self.page_num,)
+
+
+def extracted_header(source_name):
+    """Return the header written at the top of every extracted text file"""
+    return f"Extracted from: {source_name}\n" + "=" * 80 + "\n\n"
+
+
+def strip_parts(parts):
+    """Stream-equivalent of ``''.join(parts).strip()``.
+
+    Leading whitespace is dropped and trailing whitespace is held back until
+    more text arrives, so only whitespace is ever buffered.
+    """
+    started = False
+    pending = ''
+    for part in parts:
+        if not started:
+            part = part.lstrip()
+            if not part:
+                continue
+            started = True
+        body = part.rstrip()
+        if body:
+            yield pending + body
+            pending = part[len(body):]
+        else:
+            pending += part
+
+
+def join_parts(parts, sep='\n'):
+    """Stream-equivalent of ``sep.join(parts)``"""
+    first = True
+    for part in parts:
+        if first:
+            first = False
+        else:
+            yield sep
+        yield part
+
+
+def write_parts(path, parts):
+    """Write text parts to path as they arrive; return the number of characters written"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for part in parts:
+            f.write(part)
+            written += len(part)
+    return written
+
+
+def hidden_temp_path(path, kind):
+    """Return a hidden per-process temporary path in path's folder.
+
+    The name is derived from a hash of path's name, so it stays short even
+    when path's own name is already close to the filesystem's limit.
+    """
+    path = Path(path)
+    digest = hashlib.sha1(path.name.encode('utf-8')).hexdigest()[:16]
+    return path.with_name(f".{digest}.{os.getpid()}.{kind}")
+
+
+def publish_extracted(output_path, source_name, body_path):
+    """Atomically write header + body to output_path, copying the body in chunks"""
+    output_path = Path(output_path)
+    tmp_path = hidden_temp_path(output_path, 'part')
+    try:
+        with pipeline_stats.stage('write', source_name) as counter:
+            with open(tmp_path, 'w', encoding='utf-8') as out, open(body_path, 'r', encoding='utf-8') as body:
+                out.write(extracted_header(source_name))
+                shutil.copyfileobj(body, out)
+            os.replace(tmp_path, output_path)
+            counter.bytes = output_path.stat().st_size
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def spool_path_for(output_path):
+    """Return a hidden temporary path next to output_path for streaming the body"""
+    return hidden_temp_path(output_path, 'body')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Extraction Manifest
+Records each input's path, size, mtime and SHA-256 together with the output
+it produced and the extractor version that produced it, so batch runs only
+redo new or changed files (or files whose extractor changed) and can clean
+up outputs whose sources have gone
+"""
+
+import json
+import os
+from pathlib import Path
+
+from extraction_cache import file_sha256
+
+MANIFEST_VERSION = 1
+
+
+class Manifest:
+    """JSON manifest mapping source paths to the outputs produced from them"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def is_current(self, source, output, extractor=None, version=None):
+        """Return True if source is unchanged since it produced output.
+
+        Size and mtime are checked first; the file is only hashed when the
+        size matches but the mtime moved (e.g. after a copy or touch). An
+        output written by a different extractor or version is never current.
+        """
+        entry = self.entries.get(str(source))
+        if entry is None or entry.get('output') != str(output):
+            return False
+        if entry.get('extractor') != extractor or entry.get('version') != version:
+            return False
+        if not Path(output).exists():
+            return False
+        st = os.stat(source)
+        if st.st_size != entry['size']:
+            return False
+        if st.st_mtime == entry['mtime']:
+            return True
+        if file_sha256(source) != entry['sha256']:
+            return False
+        entry['mtime'] = st.st_mtime
+        return True
+
+    def record(self, source, output, sha256=None, extractor=None, version=None):
+        """Record that source produced output, using extractor at version"""
+        st = os.stat(source)
+        self.entries[str(source)] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'sha256': sha256 or file_sha256(source),
+            'output': str(output),
+            'extractor': extractor,
+            'version': version,
+        }
+
+    def prune(self, sources):
+        """Delete outputs of sources that no longer exist; return the removed outputs"""
+        keep = {str(source) for source in sources}
+        removed = []
+        for source in list(self.entries):
+            if source in keep or Path(source).exists():
+                continue
+            output = Path(self.entries.pop(source)['output'])
+            if output.exists():
+                output.unlink()
+                removed.append(output)
+        return removed
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Extraction Sandbox
+A process pool whose workers run each task under a wall-clock timeout and an
+address-space limit. Workers that hang or crash are killed (together with any
+tesseract/ffmpeg children they started) and replaced, and the task's future
+fails so the batch can move on
+"""
+
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Executor, Future
+from multiprocessing.connection import wait
+
+# Workers are started from the manager thread while other threads run, so they
+# must not be forked from this (multi-threaded) process
+_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+class WorkerTimeout(Exception):
+    """Raised for a task that ran longer than the sandbox timeout"""
+
+
+class WorkerDied(Exception):
+    """Raised for a task whose worker process exited or was killed mid-task"""
+
+
+def limit_memory(max_bytes):
+    """Cap this process's address space (or data segment) at max_bytes; return True on success"""
+    try:
+        import resource
+    except ImportError:
+        return False
+    for name in ('RLIMIT_AS', 'RLIMIT_DATA'):
+        limit = getattr(resource, name, None)
+        if limit is None:
+            continue
+        try:
+            _, hard = resource.getrlimit(limit)
+            soft = max_bytes if hard == resource.RLIM_INFINITY else min(max_bytes, hard)
+            resource.setrlimit(limit, (soft, hard))
+            return True
+        except (ValueError, OSError):
+            continue
+    return False
+
+
+def _worker_main(conn, memory_bytes):
+    """Run tasks received over conn until told to stop"""
+    # Lead a new process group so a kill also reaches tesseract/ffmpeg children
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    if memory_bytes and not limit_memory(memory_bytes):
+        print("Warning: memory limit is not supported on this platform", file=sys.stderr)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        fn, args, kwargs = task
+        try:
+            result = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, memory_bytes):
+        self.conn, child_conn = _CONTEXT.Pipe()
+        self.process = _CONTEXT.Process(target=_worker_main, args=(child_conn, memory_bytes))
+        self.process.start()
+        child_conn.close()
+        self.future = None
+        self.deadline = None
+
+    def start(self, future, task, timeout):
+        self.future = future
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send(task)
+
+    def finish(self):
+        future, self.future, self.deadline = self.future, None, None
+        return future
+
+    def kill(self):
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass  # not yet its own group leader (still starting up) or already gone
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class SandboxExecutor(Executor):
+    """Executor running each task in a worker process with a timeout and memory cap.
+
+    Tasks are submitted like with ProcessPoolExecutor. A task that runs past
+    ``timeout`` seconds fails with WorkerTimeout, and one whose worker dies
+    (e.g. a crash after hitting the ``memory_mb`` limit) fails with
+    WorkerDied; in both cases the worker is killed and a fresh one takes
+    the next task.
+    """
+
+    def __init__(self, max_workers=1, timeout=None, memory_mb=None):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._memory_bytes = memory_mb * 1024 * 1024 if memory_mb else None
+        self._pending = collections.deque()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._wake_recv, self._wake_send = multiprocessing.Pipe(duplex=False)
+        self._thread = threading.Thread(target=self._manage, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._pending.append((future, (fn, args, kwargs)))
+        self._wake()
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+        self._wake()
+        if wait:
+            self._thread.join()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(None)
+        except OSError:
+            pass
+
+    def _replace(self, worker, error):
+        """Kill a worker that overran or died and fail its task"""
+        worker.kill()
+        self._workers.remove(worker)
+        worker.finish().set_exception(error)
+
+    def _death_message(self, worker):
+        code = worker.process.exitcode
+        reason = f"killed by signal {-code}" if code is not None and code < 0 else f"exit code {code}"
+        if self.memory_mb:
+            return f"Worker died ({reason}); it may have exceeded the {self.memory_mb} MB memory limit"
+        return f"Worker died ({reason})"
+
+    def _manage(self):
+        while True:
+            with self._lock:
+                while self._pending:
+                    worker = next((w for w in self._workers if w.future is None), None)
+                    if worker is None:
+                        if len(self._workers) >= self.max_workers:
+                            break
+                        worker = _Worker(self._memory_bytes)
+                        self._workers.append(worker)
+                    future, task = self._pending.popleft()
+                    if future.set_running_or_notify_cancel():
+                        try:
+                            worker.start(future, task, self.timeout)
+                        except Exception as e:
+                            # The task could not be pickled, or the worker is gone
+                            self._replace(worker, e)
+                busy = [w for w in self._workers if w.future is not None]
+                if self._shutdown and not busy and not self._pending:
+                    break
+
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([w.conn for w in busy] + [self._wake_recv], wait_for)
+            if self._wake_recv in ready:
+                while self._wake_recv.poll():
+                    self._wake_recv.recv()
+
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        ok, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(1)
+                        self._replace(worker, WorkerDied(self._death_message(worker)))
+                        continue
+                    future = worker.finish()
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    self._replace(worker, WorkerTimeout(f"Timed out after {self.timeout:g}s"))
+
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
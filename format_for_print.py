@@ -6,10 +6,143 @@ Formats text files to look like printed documents with proper margins, page brea
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 import textwrap
 
+import pipeline_stats
+from cli_options import pop_flag, pop_option, job_count
+from extraction_io import hidden_temp_path, join_parts, write_parts
+from extraction_manifest import Manifest
+
+MANIFEST_NAME = '.format_manifest.json'
+
+# Line value that starts a new page, for callers that know where pages begin
+# (e.g. a PDF extractor) instead of writing '--- Page N ---' markers as text
+PAGE_BREAK = object()
+
+# textwrap turns each of these into a space before wrapping
+_WRAP_WHITESPACE = str.maketrans(dict.fromkeys('\t\n\x0b\x0c\r', ' '))
+
+class LineWrapper:
+    """Greedy wrapper returning the same lines as ``textwrap.wrap`` with default options.
+    
+    Instead of splitting the whole paragraph into word chunks with
+    textwrap's regex, each line's break is found by searching the text
+    around its width limit, so a multi-kilobyte paragraph costs a few string
+    operations per output line. Only hyphenated words near a break are split
+    into textwrap's chunks; the rare paragraphs where such a word is longer
+    than a whole line go to a reused TextWrapper.
+    """
+    
+    def __init__(self, width, initial_indent='', subsequent_indent=''):
+        self.width = width
+        self.initial_indent = initial_indent
+        self.subsequent_indent = subsequent_indent
+        self._textwrap = textwrap.TextWrapper(width=width, initial_indent=initial_indent,
+                                              subsequent_indent=subsequent_indent)
+    
+    def wrap(self, paragraph):
+        """Wrap one paragraph into a list of lines"""
+        text = paragraph.expandtabs() if '\t' in paragraph else paragraph
+        if '\n' in text or '\r' in text or '\x0b' in text or '\x0c' in text:
+            text = text.translate(_WRAP_WHITESPACE)
+        lines = []
+        pos = 0
+        while pos < len(text):
+            indent = self.subsequent_indent if lines else self.initial_indent
+            width = self.width - len(indent)
+            
+            # Whitespace at the start of a line is dropped, except before the first line
+            if lines and text[pos].isspace():
+                end = self._chunk_end(text, pos)
+                if not text[pos:end].strip():
+                    pos = end
+                    if pos == len(text):
+                        break
+            
+            end = self._fit(text, pos, width)
+            next_pos = end
+            drop_trailing = True
+            if end < len(text):
+                chunk_end = self._chunk_end(text, end)
+                if chunk_end - end > width:
+                    # The next chunk fits on no line: break it at the width
+                    if '-' in text[end:chunk_end]:
+                        return self._textwrap.wrap(paragraph)
+                    space_left = 1 if width < 1 else width - (end - pos)
+                    next_pos = end + space_left
+                    # textwrap adds an empty piece when nothing is left, which then
+                    # takes the place of any trailing whitespace to drop
+                    drop_trailing = space_left > 0
+            
+            line = text[pos:next_pos]
+            if drop_trailing:
+                line = self._drop_trailing_whitespace(line)
+            if line:
+                lines.append(indent + line)
+            pos = next_pos
+        return lines
+    
+    def _word_bounds(self, text, start, end):
+        """Yield the end of each of textwrap's chunks within the word text[start:end]"""
+        for chunk in self._textwrap.wordsep_re.split(text[start:end]):
+            if chunk:
+                start += len(chunk)
+                yield start
+    
+    def _chunk_end(self, text, pos):
+        """End of the chunk (a run of spaces or a word piece) that starts at pos"""
+        if text[pos] == ' ':
+            end = pos + 1
+            while end < len(text) and text[end] == ' ':
+                end += 1
+            return end
+        word_start = text.rfind(' ', 0, pos) + 1
+        word_end = text.find(' ', pos)
+        if word_end < 0:
+            word_end = len(text)
+        if text.find('-', word_start, word_end) < 0:
+            return word_end
+        return next(bound for bound in self._word_bounds(text, word_start, word_end) if bound > pos)
+    
+    def _fit(self, text, start, width):
+        """End of the longest run of whole chunks from start that fits in width"""
+        limit = start + width
+        if limit >= len(text):
+            return len(text)
+        if limit <= start:
+            return start
+        if text[limit] == ' ':
+            # Break before the run of spaces that reaches the limit
+            end = limit
+            while end > start and text[end - 1] == ' ':
+                end -= 1
+            return end
+        # A word crosses the limit: break before it, or inside it after a hyphen
+        word_start = text.rfind(' ', 0, limit) + 1
+        best = max(word_start, start)
+        word_end = text.find(' ', limit)
+        if word_end < 0:
+            word_end = len(text)
+        if text.find('-', word_start, word_end) >= 0:
+            for bound in self._word_bounds(text, word_start, word_end):
+                if bound > limit:
+                    break
+                best = max(best, bound)
+        return best
+    
+    @staticmethod
+    def _drop_trailing_whitespace(line):
+        """Drop the line's last chunk if it is whitespace, as textwrap does"""
+        if line.endswith(' '):
+            return line.rstrip(' ')
+        word_start = line.rfind(' ') + 1
+        if not line[word_start:].strip():
+            return line[:word_start]
+        return line
+
 class PrintFormatter:
     def __init__(self, 
                  page_width=80,           # Characters per line (standard printer width)
@@ -27,23 +160,40 @@ class PrintFormatter:
         self.footer = footer
         self.page_numbers = page_numbers
         self.content_width = page_width - margin_left - margin_right
+        self.wrapper = LineWrapper(self.content_width, ' ' * margin_left, ' ' * margin_left)
     
     def format_text(self, text, filename):
         """Format text for printing"""
-        lines = text.split('\n')
-        formatted_lines = []
-        current_page = 1
+        return '\n'.join(line for page in self.iter_pages(text.split('\n'), filename) for line in page)
+    
+    def iter_pages(self, lines, filename, text_markers=True):
+        """Format an iterable of lines (without newlines), yielding each finished page.
+        
+        Pages are lists of output lines ending with their page break; joining
+        every line of every page with newlines gives format_text's result.
+        Input is consumed lazily and only the current page is held in memory.
+        PAGE_BREAK items start a new page, as do '--- Page N ---' lines unless
+        text_markers is False.
+        """
+        body = self._iter_body(lines, text_markers)
+        if self.header or self.footer or self.page_numbers:
+            return self._assemble_pages(body, filename)
+        return self._split_pages(body)
+    
+    def _iter_body(self, lines, text_markers=True):
+        """Yield margined, wrapped body lines with page breaks inserted"""
+        last = None
         line_count = 0
         
         # Process each line
         for line in lines:
             # Handle page breaks
-            if line.strip().startswith('--- Page'):
-                if formatted_lines and formatted_lines[-1].strip():
-                    formatted_lines.append('')
-                formatted_lines.append(self._create_page_break())
+            if line is PAGE_BREAK or (text_markers and line.strip().startswith('--- Page')):
+                if last is not None and last.strip():
+                    yield ''
+                last = self._create_page_break()
+                yield last
                 line_count = 0
-                current_page += 1
                 continue
             
             # Skip empty lines at start of page
@@ -52,79 +202,78 @@ class PrintFormatter:
             
             # Wrap long lines
             if len(line) > self.content_width:
-                wrapped = textwrap.wrap(line, width=self.content_width, 
-                                       initial_indent=' ' * self.margin_left,
-                                       subsequent_indent=' ' * self.margin_left)
-                for wrapped_line in wrapped:
+                for wrapped_line in self.wrapper.wrap(line):
                     if line_count >= self.lines_per_page:
-                        formatted_lines.append(self._create_page_break())
+                        yield self._create_page_break()
                         line_count = 0
-                        current_page += 1
-                    formatted_lines.append(wrapped_line)
+                    last = wrapped_line
+                    yield last
                     line_count += 1
             else:
                 if line_count >= self.lines_per_page:
-                    formatted_lines.append(self._create_page_break())
+                    yield self._create_page_break()
                     line_count = 0
-                    current_page += 1
                 
                 # Add left margin
-                if line.strip():
-                    formatted_lines.append(' ' * self.margin_left + line)
-                else:
-                    formatted_lines.append('')
+                last = ' ' * self.margin_left + line if line.strip() else ''
+                yield last
                 line_count += 1
         
         # Add final page break if needed
-        if formatted_lines and not formatted_lines[-1].startswith('═'):
-            formatted_lines.append('')
-            formatted_lines.append(self._create_page_break())
-        
-        # Add headers and footers
-        if self.header or self.footer or self.page_numbers:
-            formatted_lines = self._add_headers_footers(formatted_lines, filename)
-        
-        return '\n'.join(formatted_lines)
+        if last is not None and not last.startswith('═'):
+            yield ''
+            yield self._create_page_break()
     
     def _create_page_break(self):
         """Create a visual page break"""
         return '═' * self.page_width
     
-    def _add_headers_footers(self, lines, filename):
-        """Add headers and footers to formatted text"""
-        formatted = []
+    def _split_pages(self, lines):
+        """Group lines into pages, each ending with its page break"""
+        page = []
+        for line in lines:
+            page.append(line)
+            if line.startswith('═'):
+                yield page
+                page = []
+        if page:
+            yield page
+    
+    def _assemble_pages(self, lines, filename):
+        """Yield pages with each page's header, body and footer added exactly once.
+        
+        Only the current page's lines are buffered, so the work is linear in
+        the size of the document. Placement matches the original layout: the
+        first page has no header or footer, later pages get both (when
+        footers are on) with the footer placed after as many lines as the
+        page has non-blank lines, and the page after the final break gets
+        the header and footer for the last page number.
+        """
         current_page = 1
-        page_start = 0
+        page = []
         
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            # Detect page breaks
-            if line.startswith('═'):
-                # Add footer to previous page
-                if current_page > 1 and self.footer:
-                    formatted.insert(page_start, self._create_header(filename, current_page))
-                    # Add footer before page break
-                    footer_line = len([l for l in formatted[page_start:] if l.strip()])
-                    formatted.insert(page_start + footer_line, self._create_footer(current_page))
-                
-                formatted.append(line)
-                current_page += 1
-                page_start = len(formatted)
-                i += 1
+        for line in lines:
+            if not line.startswith('═'):
+                page.append(line)
                 continue
             
-            formatted.append(line)
-            i += 1
+            # Page break: finish the page, ending it with the break itself
+            if current_page > 1 and self.footer:
+                page.insert(0, self._create_header(filename, current_page))
+                footer_at = sum(1 for l in page if l.strip())
+                page.insert(footer_at, self._create_footer(current_page))
+            page.append(line)
+            yield page
+            current_page += 1
+            page = []
         
         # Add header/footer to last page
         if self.header:
-            formatted.insert(page_start, self._create_header(filename, current_page))
+            page.insert(0, self._create_header(filename, current_page))
         if self.footer:
-            formatted.append(self._create_footer(current_page))
-        
-        return formatted
+            page.append(self._create_footer(current_page))
+        if page:
+            yield page
     
     def _create_header(self, filename, page_num):
         """Create a header line"""
@@ -142,37 +291,136 @@ class PrintFormatter:
         footer = footer_text.center(self.content_width)
         return ' ' * self.margin_left + footer
 
+def iter_file_lines(f):
+    """Yield the lines of an open text file without newlines, like ``f.read().split('\\n')``"""
+    ends_with_newline = True
+    for line in f:
+        ends_with_newline = line.endswith('\n')
+        yield line[:-1] if ends_with_newline else line
+    if ends_with_newline:
+        yield ''
+
 def format_file(input_path, output_path, formatter):
-    """Format a single file"""
+    """Format a single file, streaming it page by page from input to output"""
+    # Written under a temporary name, so a failure never leaves a truncated output behind
+    tmp_path = hidden_temp_path(output_path, 'part')
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         # Extract filename for header
         filename = Path(input_path).stem
         
-        # Format the content
-        formatted = formatter.format_text(content, filename)
-        
-        # Write formatted content
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(formatted)
+        # Read, format and write one page at a time
+        with pipeline_stats.stage('format', input_path, nbytes=os.path.getsize(input_path)):
+            with open(input_path, 'r', encoding='utf-8') as f:
+                pages = formatter.iter_pages(iter_file_lines(f), filename)
+                write_parts(tmp_path, join_parts('\n'.join(page) for page in pages))
+        os.replace(tmp_path, output_path)
         
         return True
     except Exception as e:
         print(f"Error formatting {input_path.name}: {e}", file=sys.stderr)
         return False
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def find_text_files(folder, output_folder, recursive=False):
+    """Return the .txt files in folder (and its subfolders if recursive) that need formatting.
+    
+    Already formatted files, i.e. anything under output_folder or a
+    printed_format folder, and hidden folders are left out.
+    """
+    folder = Path(folder)
+    output_folder = Path(output_folder).resolve()
+    txt_files = []
+    for txt_file in sorted(folder.glob('**/*.txt' if recursive else '*.txt')):
+        relative = txt_file.relative_to(folder)
+        if any(part.startswith('.') for part in relative.parts[:-1]):
+            continue
+        if 'printed_format' in str(txt_file) or output_folder in txt_file.resolve().parents:
+            continue
+        txt_files.append(txt_file)
+    return txt_files
+
+def formatted_path_for(txt_file, input_folder, output_folder):
+    """Output path for txt_file, mirroring its subfolder under output_folder"""
+    relative = txt_file.relative_to(input_folder)
+    return Path(output_folder) / relative.parent / f"{txt_file.stem}_formatted.txt"
+
+def format_all(txt_files, input_folder, output_folder, formatter, jobs=1, manifest=None):
+    """Format every file into output_folder, across jobs processes when jobs > 1.
+    
+    With a manifest, files unchanged since their formatted copy was written
+    are skipped, so only new or edited files are rendered.
+    Returns ``(success_count, skipped_count, failed)``.
+    """
+    success_count = 0
+    skipped_count = 0
+    failed = []
+    pending = []
+    for txt_file in txt_files:
+        output_file = formatted_path_for(txt_file, input_folder, output_folder)
+        if manifest is not None and manifest.is_current(txt_file, output_file):
+            skipped_count += 1
+            continue
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        pending.append((txt_file, output_file))
+    
+    if skipped_count:
+        print(f"Skipping {skipped_count} unchanged file(s)")
+    
+    def finished(txt_file, output_file, ok):
+        nonlocal success_count
+        if ok:
+            print(f"✓ Formatted: {txt_file.name} -> {output_file.name}")
+            success_count += 1
+            if manifest is not None:
+                manifest.record(txt_file, output_file)
+        else:
+            failed.append(txt_file)
+    
+    if jobs <= 1 or len(pending) <= 1:
+        for txt_file, output_file in pending:
+            finished(txt_file, output_file, format_file(txt_file, output_file, formatter))
+        return success_count, skipped_count, failed
+    
+    # Start the biggest files first so a long transcript is not left running
+    # on its own at the end of the batch
+    pending.sort(key=lambda item: item[0].stat().st_size, reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pipeline_stats.submit(pool, format_file, txt_file, output_file, formatter): (txt_file, output_file)
+                   for txt_file, output_file in pending}
+        for future in as_completed(futures):
+            txt_file, output_file = futures[future]
+            try:
+                ok = pipeline_stats.result(future)
+            except Exception as e:
+                print(f"Error formatting {txt_file.name}: {e}", file=sys.stderr)
+                ok = False
+            finished(txt_file, output_file, ok)
+    return success_count, skipped_count, failed
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
+    args = sys.argv[1:]
+    stats_path = pop_option(args, '--stats')
+    jobs = pop_option(args, '--jobs', 1, job_count)
+    input_folder = pop_option(args, '--input', '.')
+    recursive = pop_flag(args, '--recursive')
+    if not args:
         print("Usage: python3 format_for_print.py <input_file> [output_file]")
-        print("   or: python3 format_for_print.py --all [output_folder]")
+        print("   or: python3 format_for_print.py --all [output_folder] [--jobs N]")
         print("\nOptions:")
-        print("  --all              Format all .txt files in current directory")
+        print("  --all              Format all .txt files in current directory, skipping unchanged ones")
         print("  --output <folder>  Output folder (default: printed_format/)")
+        print("  --input <folder>   Folder to format with --all (default: current directory)")
+        print("  --recursive        Also format .txt files in subfolders, e.g. safdi/transcripts/")
+        print("  --jobs N           Format N files in parallel (0 = one per CPU core)")
+        print("  --stats FILE       Time each stage per file and write p50/p95 summary to FILE (.json or .csv)")
         sys.exit(1)
     
+    if stats_path:
+        pipeline_stats.enable(stats_path)
+    
     # Create formatter
     formatter = PrintFormatter(
         page_width=80,
@@ -184,36 +432,42 @@ def main():
         page_numbers=True
     )
     
-    if sys.argv[1] == '--all':
+    if args[0] == '--all':
         # Format all text files
-        output_folder = sys.argv[2] if len(sys.argv) > 2 else 'printed_format'
+        output_folder = args[1] if len(args) > 1 else 'printed_format'
         output_path = Path(output_folder)
         output_path.mkdir(exist_ok=True)
         
-        txt_files = list(Path('.').glob('*.txt'))
-        # Exclude already formatted files
-        txt_files = [f for f in txt_files if 'printed_format' not in str(f)]
+        txt_files = find_text_files(input_folder, output_path, recursive)
+        
+        # Drop formatted copies whose sources have been deleted since the last run
+        manifest = Manifest(output_path / MANIFEST_NAME)
+        for output_file in manifest.prune(txt_files):
+            print(f"✗ Removed {output_file.name} (source is gone)")
         
         if not txt_files:
-            print("No text files found in current directory")
+            manifest.save()
+            print(f"No text files found in {'current directory' if input_folder == '.' else input_folder}")
             return
         
-        print(f"Found {len(txt_files)} text file(s). Formatting for print...\n")
-        success_count = 0
-        
-        for txt_file in txt_files:
-            output_file = output_path / f"{txt_file.stem}_formatted.txt"
-            if format_file(txt_file, output_file, formatter):
-                print(f"✓ Formatted: {txt_file.name} -> {output_file.name}")
-                success_count += 1
+        print(f"Found {len(txt_files)} text file(s). Formatting for print with {jobs} job(s)...\n")
+        success_count, skipped_count, failed = format_all(txt_files, Path(input_folder), output_path, formatter,
+                                                          jobs, manifest)
+        manifest.save()
         
-        print(f"\n✓ Successfully formatted {success_count}/{len(txt_files)} file(s)")
+        print(f"\n✓ Successfully formatted {success_count}/{len(txt_files) - skipped_count} changed file(s)")
+        if skipped_count:
+            print(f"  {skipped_count} file(s) already up to date")
+        if failed:
+            print(f"✗ Failed: {len(failed)} file(s)")
+            for txt_file in failed:
+                print(f"  - {txt_file.name}")
         print(f"  Output folder: {output_path.absolute()}")
     else:
         # Format single file
-        input_path = Path(sys.argv[1])
-        if len(sys.argv) > 2:
-            output_path = Path(sys.argv[2])
+        input_path = Path(args[0])
+        if len(args) > 1:
+            output_path = Path(args[1])
         else:
             output_folder = Path('printed_format')
             output_folder.mkdir(exist_ok=True)
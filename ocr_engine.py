@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch OCR Engine
+Runs Tesseract over images, multi-page TIFFs, multi-frame GIFs and scanned
+PDF pages, in parallel across cores when asked to
+"""
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from extraction_cache import DEFAULT_CACHE_DIR, ExtractionCache, file_sha256
+
+RENDER_DPI = 300
+RENDER_CACHE_DIR = DEFAULT_CACHE_DIR / 'rendered'
+RENDER_CACHE_MB = int(os.environ.get('OCR_RENDER_CACHE_MB', '2048'))
+# Bump when the way pages are rendered changes so stale images are not reused
+RENDER_VERSION = 1
+
+_ocr_available = None
+_render_cache = None
+
+
+def ocr_available():
+    """Return True if pytesseract, Pillow and the tesseract binary are all usable"""
+    global _ocr_available
+    if _ocr_available is None:
+        try:
+            import pytesseract
+            from PIL import Image  # noqa: F401
+            pytesseract.get_tesseract_version()
+            _ocr_available = True
+        except Exception:
+            _ocr_available = False
+    return _ocr_available
+
+
+def _init_worker():
+    """Keep each tesseract process to one thread so N workers use N cores"""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _pool(jobs):
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+
+
+def count_frames(image_path):
+    """Return the number of frames (pages) in an image file"""
+    from PIL import Image
+    with Image.open(image_path) as image:
+        return getattr(image, 'n_frames', 1)
+
+
+def ocr_frame(image_path, frame_index=0):
+    """OCR a single frame of an image file"""
+    from PIL import Image
+    import pytesseract
+    with Image.open(image_path) as image:
+        image.seek(frame_index)
+        frame = image if image.mode in ('RGB', 'L') else image.convert('RGB')
+        return pytesseract.image_to_string(frame)
+
+
+def ocr_image(image_path, jobs=1):
+    """OCR every frame of an image and return a list of texts in frame order.
+
+    Multi-page TIFFs and animated GIFs are split into frames which are run
+    as separate Tesseract jobs across up to ``jobs`` processes.
+    """
+    frames = count_frames(image_path)
+    if jobs <= 1 or frames == 1:
+        return [ocr_frame(image_path, i) for i in range(frames)]
+    with _pool(min(jobs, frames)) as pool:
+        return list(pool.map(ocr_frame, [image_path] * frames, range(frames)))
+
+
+def render_cache():
+    """Return this process's LRU cache holding rendered PDF page images.
+
+    One instance is shared by every page so the cache size is only scanned
+    once per process, not on every store.
+    """
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = ExtractionCache(RENDER_CACHE_DIR, RENDER_CACHE_MB * 1024 * 1024, suffix='.png')
+    return _render_cache
+
+
+def render_pdf_page(pdf_path, pdf_hash, page_index, dpi=RENDER_DPI):
+    """Render one PDF page to PNG, reusing the on-disk image if it was rendered before"""
+    cache = render_cache()
+    key = (pdf_hash, f"page{page_index + 1}@{dpi}dpi", RENDER_VERSION)
+    image_path = cache.lookup(*key)
+    if image_path is not None:
+        return image_path
+
+    import pdfplumber
+    tmp_path = Path(f"{RENDER_CACHE_DIR}/.{pdf_hash[:16]}-{page_index}-{os.getpid()}.png")
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with pdfplumber.open(pdf_path, pages=[page_index + 1]) as pdf:
+            pdf.pages[0].to_image(resolution=dpi).save(tmp_path, format='PNG')
+        return cache.store(*key, tmp_path)
+    finally:
+        # Left behind only if rendering or storing failed
+        tmp_path.unlink(missing_ok=True)
+
+
+def ocr_pdf_page(pdf_path, pdf_hash, page_index, dpi=RENDER_DPI):
+    """Render and OCR one PDF page; returns "" if it could not be processed"""
+    try:
+        return ocr_frame(render_pdf_page(pdf_path, pdf_hash, page_index, dpi))
+    except Exception as e:
+        print(f"OCR failed for {Path(pdf_path).name} page {page_index + 1}: {e}", file=sys.stderr)
+        return ""
+
+
+def iter_ocr_blank_pages(pdf_path, pages, jobs=1, dpi=RENDER_DPI):
+    """Pass ``(page_number, text)`` pages through, OCRing pages with no text layer.
+
+    Pages that already have text are never rendered. With ``jobs > 1`` blank
+    pages are OCRed in worker processes while later pages are still being
+    read, and pages are yielded in their original order. If OCR is not
+    available the pages are passed through unchanged.
+    """
+    if not ocr_available():
+        yield from pages
+        return
+
+    pdf_hash = None
+    if jobs <= 1:
+        for page_num, text in pages:
+            if not text.strip():
+                pdf_hash = pdf_hash or file_sha256(pdf_path)
+                text = ocr_pdf_page(pdf_path, pdf_hash, page_num - 1, dpi) or text
+            yield page_num, text
+        return
+
+    with _pool(jobs) as pool:
+        window = deque()
+        for page_num, text in pages:
+            future = None
+            if not text.strip():
+                pdf_hash = pdf_hash or file_sha256(pdf_path)
+                future = pool.submit(ocr_pdf_page, pdf_path, pdf_hash, page_num - 1, dpi)
+            window.append((page_num, text, future))
+            # Release finished pages in order; block only if too many are queued
+            while window and (window[0][2] is None or window[0][2].done() or len(window) > jobs * 4):
+                page_num, text, future = window.popleft()
+                yield page_num, (future.result() or text) if future else text
+        while window:
+            page_num, text, future = window.popleft()
+            yield page_num, (future.result() or text) if future else text
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Fast OOXML Text Extraction
+Streams only the text parts of DOCX/PPTX zip packages through an incremental
+XML parser, producing the same text as the python-docx / python-pptx based
+extractors without loading the object model or decoding embedded media
+"""
+
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+TABLE_URI = 'http://schemas.openxmlformats.org/drawingml/2006/table'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+
+def _part_rels(package, part_name):
+    """Return ``{rel_id: (type, part_name)}`` for the relationships of a package part"""
+    base, name = posixpath.split(part_name)
+    rels = ET.fromstring(package.read(posixpath.join(base, '_rels', name + '.rels')))
+    targets = {}
+    for rel in rels.iter(PKG_REL + 'Relationship'):
+        target = rel.get('Target')
+        if rel.get('TargetMode') == 'External' or not target:
+            continue
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        targets[rel.get('Id')] = (rel.get('Type'), target)
+    return targets
+
+
+def _main_part(package):
+    """Return the name of the package's main document part (e.g. word/document.xml)"""
+    for rel_type, target in _part_rels(package, '').values():
+        if rel_type == OFFICE_DOCUMENT_REL:
+            return target
+    raise KeyError("no officeDocument relationship in package")
+
+
+# ---------- DOCX ----------
+
+def _docx_run_text(run):
+    """Text of a w:r the way python-docx renders it"""
+    text = []
+    for child in run:
+        tag = child.tag
+        if tag == W + 't':
+            text.append(child.text or '')
+        elif tag in (W + 'tab', W + 'ptab'):
+            text.append('\t')
+        elif tag == W + 'br':
+            if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                text.append('\n')
+        elif tag == W + 'cr':
+            text.append('\n')
+        elif tag == W + 'noBreakHyphen':
+            text.append('-')
+    return ''.join(text)
+
+
+def _docx_paragraph_text(p):
+    """Text of a w:p: its direct runs plus runs inside direct hyperlinks"""
+    text = []
+    for child in p:
+        if child.tag == W + 'r':
+            text.append(_docx_run_text(child))
+        elif child.tag == W + 'hyperlink':
+            text.extend(_docx_run_text(r) for r in child.findall(W + 'r'))
+    return ''.join(text)
+
+
+def _docx_cell_text(tc):
+    return '\n'.join(_docx_paragraph_text(p) for p in tc.findall(W + 'p'))
+
+
+def _docx_table_rows(tbl):
+    """Yield the ' | ' joined rows of a w:tbl, expanding merged cells like python-docx"""
+    above = {}
+    for tr in tbl.findall(W + 'tr'):
+        grid_before = tr.find(f'{W}trPr/{W}gridBefore')
+        offset = int(grid_before.get(W + 'val', '0')) if grid_before is not None else 0
+        # grid offset -> (text, span) of each cell starting at that column
+        starts = {}
+        texts = []
+        for tc in tr.findall(W + 'tc'):
+            tc_pr = tc.find(W + 'tcPr')
+            span = 1
+            continued = False
+            if tc_pr is not None:
+                grid_span = tc_pr.find(W + 'gridSpan')
+                if grid_span is not None:
+                    span = int(grid_span.get(W + 'val', '1'))
+                v_merge = tc_pr.find(W + 'vMerge')
+                continued = v_merge is not None and v_merge.get(W + 'val', 'continue') == 'continue'
+            if continued and offset in above:
+                # A vertically merged cell repeats the top cell of the span
+                text, span = above[offset]
+            else:
+                text = _docx_cell_text(tc)
+            starts[offset] = (text, span)
+            texts.extend([text] * span)
+            offset += span
+        above = starts
+        row_text = [text.strip() for text in texts if text.strip()]
+        if row_text:
+            yield " | ".join(row_text)
+
+
+def iter_docx_parts(docx_path):
+    """Yield the parts extract_docx joins with newlines: body paragraphs, then tables.
+
+    word/document.xml is parsed incrementally and each top-level paragraph
+    is released once emitted; only table rows are held until the end,
+    because the extractor lists every table after all paragraphs.
+    """
+    tables = []
+    with zipfile.ZipFile(docx_path) as package:
+        with package.open(_main_part(package)) as xml:
+            depth = 0
+            for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                # depth 2 = direct children of w:body
+                if depth != 2:
+                    continue
+                if elem.tag == W + 'p':
+                    text = _docx_paragraph_text(elem)
+                    if text.strip():
+                        yield text
+                elif elem.tag == W + 'tbl':
+                    tables.append(list(_docx_table_rows(elem)))
+                elem.clear()
+    for rows in tables:
+        yield "\n--- Table ---\n"
+        yield from rows
+
+
+# ---------- PPTX ----------
+
+def _pptx_paragraph_text(p):
+    text = []
+    for child in p:
+        if child.tag in (A + 'r', A + 'fld'):
+            t = child.find(A + 't')
+            if t is not None and t.text:
+                text.append(t.text)
+        elif child.tag == A + 'br':
+            text.append('\v')
+    return ''.join(text)
+
+
+def _pptx_text_frame_text(tx_body):
+    if tx_body is None:
+        return ''
+    return '\n'.join(_pptx_paragraph_text(p) for p in tx_body.findall(A + 'p'))
+
+
+def _pptx_shape_parts(shape):
+    """Yield the parts extract_pptx emits for one top-level shape element"""
+    if shape.tag == P + 'sp':
+        text = _pptx_text_frame_text(shape.find(P + 'txBody'))
+        if text.strip():
+            yield text
+    elif shape.tag == P + 'graphicFrame':
+        graphic_data = shape.find(f'{A}graphic/{A}graphicData')
+        if graphic_data is None or graphic_data.get('uri') != TABLE_URI:
+            return
+        tbl = graphic_data.find(A + 'tbl')
+        if tbl is None:
+            return
+        for tr in tbl.findall(A + 'tr'):
+            row_text = []
+            for tc in tr.findall(A + 'tc'):
+                text = _pptx_text_frame_text(tc.find(A + 'txBody'))
+                if text.strip():
+                    row_text.append(text.strip())
+            if row_text:
+                yield " | ".join(row_text)
+
+
+def _pptx_slide_paths(package):
+    """Return slide part names in presentation order"""
+    presentation_part = _main_part(package)
+    targets = _part_rels(package, presentation_part)
+    presentation = ET.fromstring(package.read(presentation_part))
+    sld_id_lst = presentation.find(P + 'sldIdLst')
+    if sld_id_lst is None:
+        return []
+    return [targets[sld_id.get(R + 'id')][1] for sld_id in sld_id_lst]
+
+
+def count_slides(pptx_path):
+    """Return the number of slides in a PPTX without parsing any slide"""
+    with zipfile.ZipFile(pptx_path) as package:
+        return len(_pptx_slide_paths(package))
+
+
+def iter_pptx_parts(pptx_path):
+    """Yield the parts extract_pptx joins with newlines, one slide at a time.
+
+    Each slide XML is parsed incrementally and every top-level shape is
+    released as soon as its text has been emitted. Media parts are never read.
+    """
+    with zipfile.ZipFile(pptx_path) as package:
+        for slide_num, slide_path in enumerate(_pptx_slide_paths(package)):
+            yield f"\n--- Slide {slide_num + 1} ---\n"
+            with package.open(slide_path) as xml:
+                depth = 0
+                for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                    if event == 'start':
+                        depth += 1
+                        continue
+                    depth -= 1
+                    # depth 3 = direct children of p:sld/p:cSld/p:spTree
+                    if depth == 3:
+                        yield from _pptx_shape_parts(elem)
+                        elem.clear()
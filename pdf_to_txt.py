@@ -4,62 +4,275 @@ PDF to Text Converter
 Extracts text from PDF files and saves them as .txt files
 """
 
+import math
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def extract_text_pypdf2(pdf_path):
-    """Extract text using PyPDF2"""
-    try:
-        import PyPDF2
-        text = []
-        with open(pdf_path, 'rb') as file:
+from cli_options import pop_flag, pop_option, job_count
+from extraction_cache import ExtractionCache, file_sha256
+from extraction_io import join_parts, publish_extracted, spool_path_for, strip_parts, write_parts
+from extraction_manifest import Manifest
+import pipeline_stats
+
+MANIFEST_NAME = '.pdf_to_txt_manifest.json'
+
+# Bump whenever the text produced by convert_pdf_to_txt changes so stale
+# cache entries are no longer used
+EXTRACTOR_NAME = 'pdf_to_txt'
+EXTRACTOR_VERSION = 2
+
+# Documents with at least this many pages are split into page ranges and
+# extracted in worker processes when more than one job is allowed
+PARALLEL_MIN_PAGES = 40
+MIN_RANGE_PAGES = 8
+
+def release_pdf_page(page):
+    """Drop pdfplumber's per-page caches so memory does not grow with page count"""
+    if hasattr(page, 'close'):
+        page.close()
+    else:
+        page.flush_cache()
+
+class PdfplumberFallback:
+    """Re-extracts individual pages with pdfplumber, opening the PDF only on first use"""
+    
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.pdf = None
+        self.available = True
+    
+    def extract(self, page_index):
+        """Return the page's text, or "" if pdfplumber cannot read it"""
+        if not self.available:
+            return ""
+        try:
+            if self.pdf is None:
+                import pdfplumber
+                self.pdf = pdfplumber.open(self.pdf_path)
+            page = self.pdf.pages[page_index]
+            text = page.extract_text() or ""
+            release_pdf_page(page)
+            return text
+        except ImportError:
+            self.available = False
+            return ""
+        except Exception as e:
+            print(f"Error with pdfplumber on page {page_index + 1}: {e}", file=sys.stderr)
+            return ""
+    
+    def close(self):
+        if self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+
+def iter_pages_pypdf2(pdf_path, page_range=None):
+    """Yield ``(page_number, text, engine)`` using PyPDF2"""
+    import PyPDF2
+    with open(pdf_path, 'rb') as file:
+        with pipeline_stats.stage('open', pdf_path):
             pdf_reader = PyPDF2.PdfReader(file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                text.append(f"\n--- Page {page_num + 1} ---\n")
-                text.append(page.extract_text())
-        return '\n'.join(text)
-    except ImportError:
-        return None
-    except Exception as e:
-        print(f"Error with PyPDF2: {e}", file=sys.stderr)
-        return None
+        for page_num in (page_range if page_range is not None else range(len(pdf_reader.pages))):
+            yield page_num + 1, pdf_reader.pages[page_num].extract_text() or "", 'PyPDF2'
 
-def extract_text_pdfplumber(pdf_path):
-    """Extract text using pdfplumber"""
+def iter_pages_pdfplumber(pdf_path, page_range=None):
+    """Yield ``(page_number, text, engine)`` using pdfplumber"""
+    import pdfplumber
+    selected = [i + 1 for i in page_range] if page_range is not None else None
+    with pipeline_stats.stage('open', pdf_path):
+        pdf = pdfplumber.open(pdf_path, pages=selected)
+    with pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            release_pdf_page(page)
+            yield page.page_number, text, 'pdfplumber'
+
+def iter_pages_pypdf(pdf_path, fallback=True, page_range=None):
+    """Yield ``(page_number, text, engine)`` using pypdf.
+    
+    The document is parsed once by pypdf; with fallback enabled only pages
+    that come back empty or raise are re-extracted with pdfplumber.
+    """
+    import pypdf
+    with open(pdf_path, 'rb') as file:
+        with pipeline_stats.stage('open', pdf_path):
+            pdf_reader = pypdf.PdfReader(file)
+        plumber = PdfplumberFallback(pdf_path) if fallback else None
+        try:
+            for page_num in (page_range if page_range is not None else range(len(pdf_reader.pages))):
+                page = pdf_reader.pages[page_num]
+                try:
+                    text = page.extract_text() or ""
+                except Exception as e:
+                    if plumber is None:
+                        raise
+                    print(f"Error with pypdf on page {page_num + 1}: {e}", file=sys.stderr)
+                    text = ""
+                engine = 'pypdf'
+                if plumber is not None and not text.strip():
+                    retry = plumber.extract(page_num)
+                    if retry.strip():
+                        text, engine = retry, 'pdfplumber'
+                yield page_num + 1, text, engine
+        finally:
+            if plumber is not None:
+                plumber.close()
+
+# PDF libraries in order of preference: pypdf (newest, with per-page
+# pdfplumber fallback), pdfplumber (better for complex PDFs), PyPDF2 (older
+# but common). Later engines are only used if an earlier one cannot open
+# the document at all.
+ENGINES = [
+    ('pypdf', iter_pages_pypdf),
+    ('pdfplumber', iter_pages_pdfplumber),
+    ('PyPDF2', iter_pages_pypdf2),
+]
+
+def count_pages(pdf_path):
+    """Return the number of pages using the first PDF library that works, or None"""
+    for module in ('pypdf', 'PyPDF2'):
+        try:
+            with open(pdf_path, 'rb') as file:
+                return len(__import__(module).PdfReader(file).pages)
+        except ImportError:
+            continue
+        except Exception:
+            break
     try:
         import pdfplumber
-        text = []
         with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text.append(f"\n--- Page {page_num + 1} ---\n")
-                text.append(page.extract_text() or "")
-        return '\n'.join(text)
-    except ImportError:
-        return None
-    except Exception as e:
-        print(f"Error with pdfplumber: {e}", file=sys.stderr)
+            return len(pdf.pages)
+    except Exception:
         return None
 
-def extract_text_pypdf(pdf_path):
-    """Extract text using pypdf (newer version of PyPDF2)"""
+def parse_pages(spec, count):
+    """Turn a 1-based inclusive spec like '5', '5-10', '5-' or '-10' into a range of page indexes"""
+    start, sep, stop = spec.partition('-')
     try:
-        import pypdf
-        text = []
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                text.append(f"\n--- Page {page_num + 1} ---\n")
-                text.append(page.extract_text())
-        return '\n'.join(text)
+        first = int(start) if start.strip() else 1
+        last = (int(stop) if stop.strip() else count) if sep else first
+    except ValueError:
+        raise SystemExit(f"Error: invalid page range: {spec}")
+    if first < 1 or last < first:
+        raise SystemExit(f"Error: invalid page range: {spec}")
+    return range(first - 1, min(last, count))
+
+def split_page_range(page_range, jobs):
+    """Split a range of page indexes into consecutive chunks for jobs workers"""
+    size = max(MIN_RANGE_PAGES, math.ceil(len(page_range) / (jobs * 4)))
+    return [page_range[i:i + size] for i in range(0, len(page_range), size)]
+
+def extract_page_range(iter_pages, pdf_path, page_range):
+    """Extract one page range in a worker process and return its pages as a list"""
+    return list(iter_pages(pdf_path, page_range=page_range))
+
+def iter_pages_parallel(iter_pages, pdf_path, page_range, jobs):
+    """Yield pages in page order while ranges are extracted by worker processes.
+
+    Only a window of ``2 * jobs`` ranges is in flight at a time, so memory
+    stays bounded no matter how long the document is.
+    """
+    chunks = iter(split_page_range(page_range, jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(extract_page_range, iter_pages, pdf_path, chunk))
+            if len(in_flight) >= jobs * 2:
+                break
+        while in_flight:
+            pages = in_flight.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                in_flight.append(pool.submit(extract_page_range, iter_pages, pdf_path, chunk))
+            yield from pages
+
+def iter_engine_pages(iter_pages, pdf_path, page_range=None, jobs=1):
+    """Yield pages from one engine, splitting large documents across jobs worker processes"""
+    if jobs > 1:
+        if page_range is None:
+            count = count_pages(pdf_path)
+            page_range = range(count) if count else None
+        if page_range is not None and len(page_range) >= PARALLEL_MIN_PAGES:
+            return iter_pages_parallel(iter_pages, pdf_path, page_range, jobs)
+    return iter_pages(pdf_path, page_range=page_range)
+
+def page_parts(pages, engines=None):
+    """Turn ``(page_number, text, engine)`` tuples into page markers and text.
+    
+    If engines is a list, the engine used for each page is appended to it.
+    """
+    for page_num, text, engine in pages:
+        if engines is not None:
+            engines.append(engine)
+        yield f"\n--- Page {page_num} ---\n"
+        yield text
+
+def describe_engines(engines, first_page=1):
+    """Summarise which engine produced which pages, e.g. 'pypdf: pages 1-8, 10; pdfplumber: page 9'"""
+    ranges = {}
+    for page_num, engine in enumerate(engines, start=first_page):
+        spans = ranges.setdefault(engine, [])
+        if spans and spans[-1][1] == page_num - 1:
+            spans[-1][1] = page_num
+        else:
+            spans.append([page_num, page_num])
+    summary = []
+    for engine, spans in ranges.items():
+        pages = ', '.join(f"{a}-{b}" if a != b else str(a) for a, b in spans)
+        label = 'page' if len(spans) == 1 and spans[0][0] == spans[0][1] else 'pages'
+        summary.append(f"{engine}: {label} {pages}")
+    return '; '.join(summary)
+
+def _join_engine(name, iter_pages, pdf_path, **kwargs):
+    try:
+        return '\n'.join(page_parts(iter_pages(pdf_path, **kwargs)))
     except ImportError:
         return None
     except Exception as e:
-        print(f"Error with pypdf: {e}", file=sys.stderr)
+        print(f"Error with {name}: {e}", file=sys.stderr)
         return None
 
-def convert_pdf_to_txt(pdf_path, output_path=None):
-    """Convert PDF to text file"""
+def extract_text_pypdf2(pdf_path):
+    """Extract text using PyPDF2"""
+    return _join_engine('PyPDF2', iter_pages_pypdf2, pdf_path)
+
+def extract_text_pdfplumber(pdf_path):
+    """Extract text using pdfplumber"""
+    return _join_engine('pdfplumber', iter_pages_pdfplumber, pdf_path)
+
+def extract_text_pypdf(pdf_path):
+    """Extract text using pypdf (newer version of PyPDF2)"""
+    return _join_engine('pypdf', iter_pages_pypdf, pdf_path, fallback=False)
+
+def stream_text(pdf_path, body_path, page_range=None, jobs=1):
+    """Stream the stripped text of a PDF into body_path page by page.
+
+    Engines are tried in order of preference; a failure to read the
+    document restarts the file with the next engine. Returns
+    ``(characters_written, engines)`` where engines names the engine that
+    produced each page, or ``(None, None)`` if no engine could read the PDF.
+    """
+    for name, iter_pages in ENGINES:
+        engines = []
+        try:
+            pages = pipeline_stats.timed(iter_engine_pages(iter_pages, pdf_path, page_range, jobs), 'page', pdf_path,
+                                         size=lambda page: len(page[1].encode('utf-8')))
+            parts = page_parts(pages, engines)
+            return write_parts(body_path, strip_parts(join_parts(parts))), engines
+        except ImportError:
+            continue
+        except Exception as e:
+            print(f"Error with {name}: {e}", file=sys.stderr)
+    return None, None
+
+def convert_pdf_to_txt(pdf_path, output_path=None, cache=None, manifest=None, jobs=1, pages=None):
+    """Convert PDF to text file, reusing cached text for identical PDFs.
+    
+    Large documents are split into page ranges across jobs worker processes;
+    pages is an optional 1-based spec like '5-10' to extract only a slice.
+    """
     pdf_path = Path(pdf_path)
     
     if not pdf_path.exists():
@@ -71,70 +284,120 @@ def convert_pdf_to_txt(pdf_path, output_path=None):
     else:
         output_path = Path(output_path)
     
-    # Try different PDF libraries in order of preference
-    text = None
-    
-    # Try pypdf first (newest)
-    text = extract_text_pypdf(pdf_path)
-    
-    # Try pdfplumber (better for complex PDFs)
-    if not text:
-        text = extract_text_pdfplumber(pdf_path)
+    page_range = None
+    extractor = EXTRACTOR_NAME
+    if pages:
+        count = count_pages(pdf_path)
+        if count is None:
+            print(f"Error: Could not count pages in {pdf_path.name}")
+            return False
+        page_range = parse_pages(pages, count)
+        extractor = f"{EXTRACTOR_NAME}[{page_range.start + 1}-{page_range.stop}]"
     
-    # Try PyPDF2 (older but common)
-    if not text:
-        text = extract_text_pypdf2(pdf_path)
+    file_hash = None
+    body_path = None
+    if cache is not None:
+        file_hash = file_sha256(pdf_path)
+        body_path = cache.lookup(file_hash, extractor, EXTRACTOR_VERSION)
+    cached = body_path is not None
     
-    if not text:
-        print("Error: No PDF extraction library found.")
-        print("Install one with: pip3 install pypdf pdfplumber")
-        return False
-    
-    # Clean up text
-    text = text.strip()
-    
-    if not text:
-        print(f"Warning: No text extracted from {pdf_path.name}")
-        return False
+    if not cached:
+        # Stream pages straight to disk instead of building one big string
+        body_path = spool_path_for(output_path)
+        with pipeline_stats.stage('extract', pdf_path, nbytes=pdf_path.stat().st_size):
+            written, engines = stream_text(pdf_path, body_path, page_range, jobs)
+        
+        if written is None:
+            print("Error: No PDF extraction library found.")
+            print("Install one with: pip3 install pypdf pdfplumber")
+            if body_path.exists():
+                body_path.unlink()
+            return False
+        
+        if not written:
+            print(f"Warning: No text extracted from {pdf_path.name}")
+            body_path.unlink()
+            return False
+        
+        if cache is not None:
+            body_path = cache.store(file_hash, extractor, EXTRACTOR_VERSION, body_path)
     
     # Write to file
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"Extracted from: {pdf_path.name}\n")
-            f.write("=" * 80 + "\n\n")
-            f.write(text)
-        print(f"✓ Converted: {pdf_path.name} -> {output_path.name}")
+        publish_extracted(output_path, pdf_path.name, body_path)
+        note = " (cached)" if cached else ""
+        print(f"✓ Converted: {pdf_path.name} -> {output_path.name}{note}")
+        if not cached:
+            first_page = page_range.start + 1 if page_range is not None else 1
+            print(f"  {describe_engines(engines, first_page)}")
+        if manifest is not None:
+            manifest.record(pdf_path, output_path, file_hash, extractor, EXTRACTOR_VERSION)
         return True
     except Exception as e:
         print(f"Error writing file: {e}", file=sys.stderr)
         return False
+    finally:
+        if cache is None and body_path.exists():
+            body_path.unlink()
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python3 pdf_to_txt.py <pdf_file> [output_file]")
+    args = sys.argv[1:]
+    cache = None if pop_flag(args, '--no-cache') else ExtractionCache()
+    jobs = pop_option(args, '--jobs', 1, job_count)
+    pages = pop_option(args, '--pages')
+    stats_path = pop_option(args, '--stats')
+    
+    if not args:
+        print("Usage: python3 pdf_to_txt.py <pdf_file> [output_file] [--pages 5-10]")
         print("   or: python3 pdf_to_txt.py --all  (convert all PDFs in current directory)")
+        print("\nOptions:")
+        print("  --no-cache  Re-parse every PDF instead of using .extraction_cache/")
+        print(f"  --jobs N    Split PDFs of {PARALLEL_MIN_PAGES}+ pages across N processes (0 = one per CPU core)")
+        print("  --pages R   Only extract pages R of a single PDF, e.g. 5, 5-10, 5- or -10")
+        print("  --stats F   Time each stage per file and write p50/p95 summary to F (.json or .csv)")
         sys.exit(1)
     
-    if sys.argv[1] == '--all':
+    if stats_path:
+        pipeline_stats.enable(stats_path)
+    
+    if args[0] == '--all':
+        if pages:
+            print("Error: --pages only applies to a single PDF")
+            sys.exit(1)
+
         # Convert all PDFs in current directory
         pdf_files = list(Path('.').glob('*.pdf'))
+        
+        # Drop outputs whose PDFs have been deleted since the last run
+        manifest = Manifest(MANIFEST_NAME)
+        for output_file in manifest.prune(pdf_files):
+            print(f"✗ Removed {output_file.name} (source is gone)")
+        
         if not pdf_files:
+            manifest.save()
             print("No PDF files found in current directory")
             return
         
         print(f"Found {len(pdf_files)} PDF file(s). Converting...\n")
         success_count = 0
+        skipped_count = 0
         for pdf_file in pdf_files:
-            if convert_pdf_to_txt(pdf_file):
+            if manifest.is_current(pdf_file, pdf_file.with_suffix('.txt'), EXTRACTOR_NAME, EXTRACTOR_VERSION):
+                skipped_count += 1
+                continue
+            if convert_pdf_to_txt(pdf_file, cache=cache, manifest=manifest, jobs=jobs):
                 success_count += 1
+        manifest.save()
         
-        print(f"\n✓ Successfully converted {success_count}/{len(pdf_files)} PDF(s)")
+        print(f"\n✓ Successfully converted {success_count}/{len(pdf_files) - skipped_count} changed PDF(s)")
+        if skipped_count:
+            print(f"  {skipped_count} PDF(s) already up to date")
     else:
         # Convert single file
-        pdf_path = sys.argv[1]
-        output_path = sys.argv[2] if len(sys.argv) > 2 else None
-        convert_pdf_to_txt(pdf_path, output_path)
+        pdf_path = args[0]
+        output_path = args[1] if len(args) > 1 else None
+        convert_pdf_to_txt(pdf_path, output_path, cache, jobs=jobs, pages=pages)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Statistics
+Shared instrumentation for the extraction, formatting and podcast scripts:
+times each stage per file (open, parse, page, write, download, transcribe,
+...), counts bytes and pages, and writes a JSON or CSV summary with p50/p95
+latencies at the end of a run
+"""
+
+import atexit
+import csv
+import json
+import math
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+SUMMARY_FIELDS = ['stage', 'count', 'total_s', 'mean_s', 'p50_s', 'p95_s', 'max_s', 'bytes', 'pages']
+
+# Collector for this process, or None when --stats was not given
+_active = None
+
+
+class StageCounter:
+    """Bytes and pages attributed to one timed stage"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.pages = 0
+
+
+class StageStats:
+    """Collects ``(stage, file, seconds, bytes, pages)`` samples"""
+
+    def __init__(self):
+        self.samples = []
+        self.started = time.time()
+
+    def add(self, stage, seconds, file=None, nbytes=0, pages=0):
+        self.samples.append((stage, str(file) if file is not None else None, seconds, nbytes, pages))
+
+    def merge(self, samples):
+        self.samples.extend(tuple(sample) for sample in samples)
+
+    def summary(self):
+        """Return ``{stage: {count, total_s, mean_s, p50_s, p95_s, max_s, bytes, pages}}``"""
+        stages = {}
+        for stage, _, seconds, nbytes, pages in self.samples:
+            entry = stages.setdefault(stage, {'times': [], 'bytes': 0, 'pages': 0})
+            entry['times'].append(seconds)
+            entry['bytes'] += nbytes
+            entry['pages'] += pages
+        summary = {}
+        for stage, entry in stages.items():
+            times = sorted(entry['times'])
+            summary[stage] = {
+                'count': len(times),
+                'total_s': sum(times),
+                'mean_s': sum(times) / len(times),
+                'p50_s': percentile(times, 50),
+                'p95_s': percentile(times, 95),
+                'max_s': times[-1],
+                'bytes': entry['bytes'],
+                'pages': entry['pages'],
+            }
+        return summary
+
+    def save(self, path):
+        """Write the summary to path as CSV (for a .csv path) or JSON with every sample"""
+        path = Path(path)
+        summary = self.summary()
+        if path.suffix.lower() == '.csv':
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                for stage, entry in summary.items():
+                    writer.writerow({'stage': stage, **entry})
+            return
+        data = {
+            'command': ' '.join(sys.argv),
+            'started': self.started,
+            'wall_s': time.time() - self.started,
+            'summary': summary,
+            'samples': [dict(zip(('stage', 'file', 'seconds', 'bytes', 'pages'), sample))
+                        for sample in self.samples],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"\n{'Stage':<12} {'Count':>6} {'Total s':>9} {'p50 ms':>9} {'p95 ms':>9} {'Max ms':>9} {'MB':>8} {'Pages':>6}")
+        for stage, entry in summary.items():
+            print(f"{stage:<12} {entry['count']:>6} {entry['total_s']:>9.2f} {entry['p50_s'] * 1000:>9.1f} "
+                  f"{entry['p95_s'] * 1000:>9.1f} {entry['max_s'] * 1000:>9.1f} "
+                  f"{entry['bytes'] / (1024 * 1024):>8.2f} {entry['pages'] or '-':>6}")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def enable(path=None):
+    """Start collecting stats in this process; with a path, print and save them at exit"""
+    global _active
+    _active = StageStats()
+    if path:
+        atexit.register(_finish, _active, path)
+    return _active
+
+
+def _finish(stats, path):
+    stats.print_summary()
+    try:
+        stats.save(path)
+        print(f"✓ Stage timings written to {path}")
+    except OSError as e:
+        print(f"✗ Could not write stage timings to {path}: {e}")
+
+
+def enabled():
+    return _active is not None
+
+
+def record(stage, seconds, file=None, nbytes=0, pages=0):
+    """Record an already measured stage"""
+    if _active is not None:
+        _active.add(stage, seconds, file, nbytes, pages)
+
+
+@contextmanager
+def stage(name, file=None, nbytes=0, pages=0):
+    """Time the enclosed block as one sample of stage name.
+
+    Yields a StageCounter whose bytes/pages can be updated inside the block.
+    """
+    counter = StageCounter()
+    counter.bytes, counter.pages = nbytes, pages
+    if _active is None:
+        yield counter
+        return
+    start = time.perf_counter()
+    try:
+        yield counter
+    finally:
+        _active.add(name, time.perf_counter() - start, file, counter.bytes, counter.pages)
+
+
+def timed(items, name, file=None, size=None, pages=1):
+    """Pass items through, recording the time spent producing each one as a stage sample.
+
+    size optionally maps an item to its byte count. Meant for page and chunk
+    generators, where the work happens inside ``next()``.
+    """
+    if _active is None:
+        yield from items
+        return
+    items = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        _active.add(name, time.perf_counter() - start, file, size(item) if size else 0, pages)
+        yield item
+
+
+def call_with_stats(fn, *args, **kwargs):
+    """Run fn collecting stats locally; return ``(result, samples)``.
+
+    Used as the task function in worker processes so their samples can be
+    merged back into the parent's collector.
+    """
+    global _active
+    previous, _active = _active, StageStats()
+    try:
+        return fn(*args, **kwargs), _active.samples
+    finally:
+        _active = previous
+
+
+def submit(pool, fn, *args, **kwargs):
+    """Submit fn to an executor, collecting its stats in the worker if stats are enabled"""
+    if _active is None:
+        return pool.submit(fn, *args, **kwargs)
+    return pool.submit(call_with_stats, fn, *args, **kwargs)
+
+
+def result(future):
+    """Return the result of a future from submit(), merging any stats it collected"""
+    value = future.result()
+    if _active is None:
+        return value
+    value, samples = value
+    _active.merge(samples)
+    return value
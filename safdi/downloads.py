@@ -0,0 +1,284 @@
+"""
+Shared HTTP download manager for the podcast scrapers.
+
+Keeps keep-alive connections open per host and reuses them across requests
+and threads, and caps how many requests run against one host at a time;
+the scrapers' download concurrency comes from the episode pipeline's
+download workers. Downloads stream to a .part file and resume with HTTP Range
+requests after an interruption. Uses only the standard library.
+"""
+
+import http.client
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+CHUNK_SIZE = 1024 * 512
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+DOWNLOAD_RETRIES = 3   # resume attempts after a dropped connection
+RETRY_DELAY_SEC = 1.0  # grows linearly with each attempt
+# Failures of the connection itself, which a resumed request can get past. Any
+# other OSError (a full disk, an unwritable folder) comes from the .part file
+# and is raised straight away.
+NETWORK_ERRORS = (ConnectionError, TimeoutError, socket.gaierror, ssl.SSLError, http.client.HTTPException)
+
+
+class DownloadError(Exception):
+    """Raised for HTTP error statuses, redirect loops, unsupported URLs and incomplete downloads"""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def resume_validator(response) -> str | None:
+    """The response's ETag, or its Last-Modified date when the ETag is missing or weak (If-Range needs a strong one)"""
+    etag = response.getheader("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.getheader("Last-Modified")
+
+
+def parse_content_range(value: str | None):
+    """
+    Returns (start, total) from a 'bytes start-end/total' Content-Range header,
+    with total 0 if the server does not know it, or None if it cannot be parsed.
+    """
+    try:
+        unit, _, spec = (value or "").partition(" ")
+        byte_range, _, total = spec.partition("/")
+        if unit != "bytes":
+            return None
+        return int(byte_range.split("-")[0]), 0 if total == "*" else int(total)
+    except ValueError:
+        return None
+
+
+class DownloadManager:
+    """
+    Pooled HTTP client with a per-host concurrency limit.
+
+    get() and download() run in the calling thread and are safe to call from
+    several threads; whatever thread a request runs on, at most per_host
+    requests are open against the same host at once.
+    """
+
+    def __init__(self, per_host: int = 2, timeout: float = 60, user_agent: str = "Mozilla/5.0"):
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.headers = {"User-Agent": user_agent, "Accept-Encoding": "identity"}
+        self._lock = threading.Lock()
+        self._idle = {}   # host -> idle keep-alive connections
+        self._slots = {}  # host -> semaphore limiting concurrent requests
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close idle keep-alive connections"""
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    def get(self, url: str) -> bytes:
+        """Return the body of url"""
+        with self.open(url) as response:
+            return response.read()
+
+    def download(self, url: str, dest: Path, progress=None, retries: int = DOWNLOAD_RETRIES) -> int:
+        """
+        Stream url into dest and return the number of bytes transferred.
+
+        Data goes to dest + '.part', which is renamed to dest only once its size
+        matches Content-Length (or Content-Range), so dest never holds a
+        truncated file. The response's ETag/Last-Modified is kept in
+        dest + '.part.json', and after a dropped connection, or on a later run
+        that finds the .part file, the download resumes with a Range request
+        sent with If-Range, so a changed file is fetched again from the start
+        instead of being spliced onto the old prefix. A .part file without a
+        stored validator is discarded.
+        progress(nbytes, total) is called after each chunk; total is 0 if unknown.
+        If the server restarts the file from scratch, it is called once with a
+        negative nbytes that takes back what was reported before.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + ".part")
+        meta = dest.with_name(dest.name + ".part.json")
+        received = 0
+        reported = 0
+        validator = self._load_validator(meta)
+        for attempt in range(retries + 1):
+            offset = part.stat().st_size if part.exists() else 0
+            if offset and validator is None:
+                # No way to tell whether the partial data matches the server's copy
+                part.unlink()
+                offset = 0
+            headers = {}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            try:
+                with self.open(url, headers) as response:
+                    if response.status == 206:
+                        content_range = parse_content_range(response.getheader("Content-Range"))
+                        if content_range is None or content_range[0] != offset:
+                            raise DownloadError(f"Unexpected Content-Range for {url}")
+                        total = content_range[1]
+                    else:
+                        # The server sent the whole file: remember what version it is
+                        offset = 0
+                        total = int(response.getheader("Content-Length") or 0)
+                        if progress and reported:
+                            progress(-reported, total)
+                            reported = 0
+                        validator = resume_validator(response)
+                        self._save_validator(meta, url, validator)
+                    if progress and offset > reported:
+                        progress(offset - reported, total)
+                        reported = offset
+                    with open(part, "ab" if offset else "wb") as f:
+                        while True:
+                            chunk = response.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            received += len(chunk)
+                            if progress:
+                                progress(len(chunk), total)
+                                reported += len(chunk)
+            except DownloadError as e:
+                if offset and e.status in (None, 416):
+                    # The partial file does not line up with the server's copy: start over
+                    part.unlink(missing_ok=True)
+                    continue
+                raise
+            except NETWORK_ERRORS:
+                # Dropped connection or timeout: keep the .part file and resume
+                if attempt == retries:
+                    raise
+                time.sleep(RETRY_DELAY_SEC * (attempt + 1))
+                continue
+
+            size = part.stat().st_size
+            if total and size != total:
+                if size > total:
+                    part.unlink()
+                if attempt == retries:
+                    raise DownloadError(f"Incomplete download of {url}: {size} of {total} bytes")
+                continue
+            os.replace(part, dest)
+            meta.unlink(missing_ok=True)
+            return received
+        raise DownloadError(f"Could not download {url} after {retries + 1} attempts")
+
+    @staticmethod
+    def _load_validator(meta: Path) -> str | None:
+        try:
+            return json.loads(meta.read_text(encoding="utf-8")).get("validator")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def _save_validator(meta: Path, url: str, validator: str | None):
+        if validator is None:
+            meta.unlink(missing_ok=True)
+            return
+        tmp = meta.with_name(meta.name + ".tmp")
+        tmp.write_text(json.dumps({"url": url, "validator": validator}), encoding="utf-8")
+        os.replace(tmp, meta)
+
+    @contextmanager
+    def open(self, url: str, headers: dict | None = None):
+        """
+        Send a GET for url (with any extra headers), following redirects, and
+        yield the final response.
+        The connection returns to the pool if the body was read to the end.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            host = self._host(parts)
+            with self._slot(host):
+                conn, response = self._send(host, parts, headers)
+                reusable = False
+                try:
+                    location = response.getheader("Location")
+                    if response.status in REDIRECT_STATUSES and location:
+                        response.read()
+                        reusable = True
+                        url = urljoin(url, location)
+                        continue
+                    if response.status >= 400:
+                        response.read()
+                        reusable = True
+                        raise DownloadError(f"HTTP {response.status} {response.reason} for {url}", response.status)
+                    yield response
+                    reusable = response.isclosed()
+                    return
+                finally:
+                    self._release(host, conn, reusable and not response.will_close)
+        raise DownloadError(f"Too many redirects for {url}")
+
+    # ---------- connection pool ----------
+
+    @staticmethod
+    def _host(parts):
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise DownloadError(f"Unsupported URL: {parts.geturl()}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _slot(self, host):
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _connect(self, host):
+        scheme, hostname, port = host
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(hostname, port, timeout=self.timeout)
+
+    def _send(self, host, parts, headers=None):
+        """Send the request on a pooled connection, retrying once on a fresh one if it went stale"""
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {**self.headers, **(headers or {})}
+        with self._lock:
+            idle = self._idle.get(host)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            try:
+                conn.request("GET", path, headers=headers)
+                return conn, conn.getresponse()
+            except (ConnectionError, http.client.HTTPException, OSError):
+                # The server closed the keep-alive connection while it sat idle
+                conn.close()
+        conn = self._connect(host)
+        try:
+            conn.request("GET", path, headers=headers)
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def _release(self, host, conn, reusable: bool):
+        if not reusable:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault(host, []).append(conn)
@@ -0,0 +1,169 @@
+"""
+Producer/consumer pipeline for the podcast scrapers.
+
+Download workers fetch episode audio and put it on a bounded queue, and
+transcription workers take it from there, so episode N+1 downloads while
+episode N is transcribed. The queue limit keeps downloads from running far
+ahead of transcription and filling the disk. At the end of a run the busy
+share of each stage and the queue depth are reported, which shows whether
+the network or the transcriber is the bottleneck.
+"""
+
+import itertools
+import math
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+_DONE = object()  # tells a transcription worker that no more audio is coming
+
+
+class StageMeter:
+    """Busy time and item counts for the workers of one stage"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.done = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def working(self):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._lock:
+                self.busy += time.perf_counter() - start
+                if ok:
+                    self.done += 1
+                else:
+                    self.failed += 1
+
+    def utilization(self, wall: float) -> float:
+        """Share of the workers' wall-clock time spent working, 0..1"""
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+
+class EpisodePipeline:
+    """
+    download(job) -> audio path, run on download_workers threads;
+    transcribe(audio_path) -> text, run on transcribe_workers threads;
+    at most queue_depth downloaded episodes wait between the two.
+    With priority(job) -> number, the biggest jobs are downloaded first and
+    the biggest waiting episode is transcribed next; otherwise jobs go
+    through in order.
+
+    run(jobs) yields (job, text, error) as each episode finishes, in
+    completion order; error is the exception that stopped it, or None.
+    """
+
+    def __init__(self, download, transcribe, download_workers: int = 2,
+                 transcribe_workers: int = 1, queue_depth: int = 2, priority=None):
+        self.download = download
+        self.transcribe = transcribe
+        self.priority = priority
+        self.queue_depth = max(1, queue_depth)
+        self.download_meter = StageMeter("download", max(1, download_workers))
+        self.transcribe_meter = StageMeter("transcribe", max(1, transcribe_workers))
+        self.depths = []  # queue depth seen each time a transcription worker takes an episode
+        self.wall = 0.0
+
+    def run(self, jobs):
+        jobs = list(jobs)
+        if not jobs:
+            return
+        if self.priority is not None:
+            jobs.sort(key=self.priority, reverse=True)
+        todo = queue.Queue()
+        for job in jobs:
+            todo.put(job)
+        # (-priority, arrival, item): biggest first, ties (and no priority) in arrival order
+        ready = queue.PriorityQueue(maxsize=self.queue_depth)
+        arrival = itertools.count()
+        results = queue.Queue()
+        stop = threading.Event()
+        producers_left = [self.download_meter.workers]
+        lock = threading.Lock()
+
+        def put(key, item):
+            # Blocks while the queue is full, giving up if the run was abandoned
+            while not stop.is_set():
+                try:
+                    ready.put((key, next(arrival), item), timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def download_worker():
+            try:
+                while not stop.is_set():
+                    try:
+                        job = todo.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        with self.download_meter.working():
+                            audio_path = self.download(job)
+                        key = -self.priority(job) if self.priority else 0
+                    except Exception as e:
+                        results.put((job, None, e))
+                        continue
+                    put(key, (job, audio_path))
+            finally:
+                with lock:
+                    producers_left[0] -= 1
+                    last = producers_left[0] == 0
+                if last:
+                    for _ in range(self.transcribe_meter.workers):
+                        put(math.inf, _DONE)
+
+        def transcribe_worker():
+            while not stop.is_set():
+                depth = ready.qsize()  # 0 means this worker had to wait for a download
+                try:
+                    _, _, item = ready.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                self.depths.append(depth)
+                job, audio_path = item
+                try:
+                    with self.transcribe_meter.working():
+                        text = self.transcribe(audio_path)
+                except Exception as e:
+                    results.put((job, None, e))
+                    continue
+                results.put((job, text, None))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=download_worker, name=f"download-{i}", daemon=True)
+                   for i in range(self.download_meter.workers)]
+        threads += [threading.Thread(target=transcribe_worker, name=f"transcribe-{i}", daemon=True)
+                    for i in range(self.transcribe_meter.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for _ in jobs:
+                yield results.get()
+        finally:
+            stop.set()
+            self.wall = time.perf_counter() - start
+
+    def report(self) -> str:
+        """Per-stage utilization and queue depth for the last run"""
+        lines = [f"Pipeline: {self.wall:.1f}s wall"]
+        for meter in (self.download_meter, self.transcribe_meter):
+            lines.append(f"  {meter.name:<11} {meter.workers} worker(s)  busy {meter.utilization(self.wall):4.0%}"
+                         f"  ({meter.done} done, {meter.failed} failed)")
+        if self.depths:
+            average = sum(self.depths) / len(self.depths)
+            lines.append(f"  {'queue':<11} depth avg {average:.1f} / max {max(self.depths)}"
+                         f" (limit {self.queue_depth})")
+        return "\n".join(lines)
@@ -0,0 +1,101 @@
+"""
+Incremental RSS item parsing for the podcast scrapers.
+
+Feeds list episodes newest first, so a run only needs the items published
+since the last time every episode was done. iter_feed_items() streams <item>
+elements out of the feed without building the whole tree, and FeedState
+remembers the newest finished episode (and how many items the feed had then)
+so parsing stops there and fallback episode numbers carry on from that count.
+Those numbers match a full oldest-first count only while no older episodes
+have dropped off the feed. The new items themselves are all held in memory,
+since they are handed back oldest first; on a first run or a backfill that
+is the whole catalog, as before.
+"""
+
+import io
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+STATE_NAME = ".feed_state.json"
+
+
+def iter_feed_items(data: bytes):
+    """
+    Yield each <item> element of an RSS document as soon as it is parsed.
+    Items are detached from the tree once the caller moves on, so the tree
+    does not keep them alive; closing the generator stops parsing.
+    """
+    parents = []
+    for event, el in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+        if event == "start":
+            parents.append(el)
+            continue
+        parents.pop()
+        if el.tag == "item":
+            yield el
+            if parents:
+                parents[-1].remove(el)
+
+
+def item_guid(item) -> str:
+    """Stable identity for an item: its <guid>, else its enclosure URL, else its title"""
+    for tag in ("guid", "enclosure", "title"):
+        el = item.find(tag)
+        if el is None:
+            continue
+        value = (el.attrib.get("url") if tag == "enclosure" else el.text) or ""
+        if value.strip():
+            return value.strip()
+    return ""
+
+
+class FeedState:
+    """
+    The newest episode known to be done and the feed's item count at that time,
+    kept in a small JSON file next to the transcripts.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        self.newest = state.get("newest")
+        self.count = state.get("count", 0)
+        self._seen = (self.newest, self.count)
+
+    def new_items(self, data: bytes):
+        """
+        Return ``[(index, item)]`` oldest first for the items newer than the
+        recorded episode, numbered on from the item count recorded with it.
+        That is each item's 1-based position in the whole feed, counted from
+        the oldest episode, only while no older items have dropped off the
+        feed since; if some have, a full parse would number the new items
+        lower, while these keep following the earlier episodes' numbers.
+        Without a recorded episode, or if it has left the feed, every item is
+        returned and numbered from 1. Only the items already recorded as done
+        are skipped (and never parsed); the returned ones are all kept in
+        memory until the caller drops the list.
+        """
+        items = []
+        base = 0
+        for item in iter_feed_items(data):
+            guid = item_guid(item)
+            if self.newest and guid == self.newest:
+                base = self.count
+                break
+            items.append((guid, item))
+        if items:
+            self._seen = (items[0][0], base + len(items))
+        items.reverse()
+        return [(base + i, item) for i, (_, item) in enumerate(items, start=1)]
+
+    def save(self):
+        """Record the newest item returned by new_items() as done; call once every new episode is finished"""
+        self.newest, self.count = self._seen
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"newest": self.newest, "count": self.count}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
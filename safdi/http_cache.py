@@ -0,0 +1,82 @@
+"""
+Small on-disk HTTP cache for the Apple lookup and the RSS feed.
+
+Each URL's last body is kept next to its ETag / Last-Modified validators.
+Within a URL's TTL the cached body is returned without touching the network;
+after that a conditional GET is sent and a 304 Not Modified reuses the
+cached body, so polling an unchanged feed costs one tiny request.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from downloads import DownloadManager
+
+CACHE_DIR = Path(".http_cache")
+LOOKUP_TTL_SEC = 24 * 60 * 60  # the show's feed URL almost never changes
+FEED_TTL_SEC = 5 * 60          # how long a fetched feed is trusted without revalidating
+
+
+class HttpCache:
+    """
+    Conditional GETs through a DownloadManager, with bodies cached in folder.
+
+    get(url, ttl) returns the body of url: straight from disk if it was
+    fetched or revalidated less than ttl seconds ago, otherwise after a
+    request carrying If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, downloads: DownloadManager, folder: Path = CACHE_DIR):
+        self.downloads = downloads
+        self.folder = Path(folder)
+
+    def get(self, url: str, ttl: float = 0) -> bytes:
+        meta_path, body_path = self._paths(url)
+        meta = self._load(meta_path) if body_path.exists() else None
+        if meta and time.time() - meta["fetched_at"] < ttl:
+            return body_path.read_bytes()
+
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        with self.downloads.open(url, headers) as response:
+            body = response.read()
+            etag = response.getheader("ETag")
+            last_modified = response.getheader("Last-Modified")
+
+        if response.status == 304 and meta:
+            body = body_path.read_bytes()
+        else:
+            # Drop the old validators before replacing the body, so a crash in
+            # between can never pair the new body with the old ETag
+            meta = {"url": url, "fetched_at": 0}
+            self._write(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+            self._write(body_path, body)
+        meta.update(fetched_at=time.time(),
+                    etag=etag or meta.get("etag"),
+                    last_modified=last_modified or meta.get("last_modified"))
+        self._write(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+        return body
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+        return self.folder / f"{key}.json", self.folder / f"{key}.body"
+
+    @staticmethod
+    def _load(meta_path: Path):
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, data: bytes):
+        # Write then rename, so an interrupted run never leaves half a body behind
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -4,9 +4,12 @@ import json
 import time
 import urllib.request
 import urllib.error
-import xml.etree.ElementTree as ET
 from pathlib import Path
 
+from downloads import DownloadManager
+from feed_items import STATE_NAME, FeedState
+from http_cache import FEED_TTL_SEC, LOOKUP_TTL_SEC, HttpCache
+
 # ---------------- CONFIG ----------------
 PODCAST_ID = "1447749859"
 OUT_DIR = Path("transcripts")
@@ -26,8 +29,8 @@ def http_get(url: str) -> bytes:
         return resp.read()
 
 
-def fetch_feed_url() -> str:
-    data = json.loads(http_get(APPLE_LOOKUP_URL))
+def fetch_feed_url(cache: HttpCache) -> str:
+    data = json.loads(cache.get(APPLE_LOOKUP_URL, LOOKUP_TTL_SEC))
     results = data.get("results", [])
     if not results:
         raise RuntimeError("Apple lookup returned no results")
@@ -101,21 +104,25 @@ def fetch_transcript_text(url: str) -> str | None:
 def main():
     OUT_DIR.mkdir(exist_ok=True)
 
-    print("Fetching RSS feed URL…")
-    feed_url = fetch_feed_url()
-    print("RSS:", feed_url)
-
-    rss_xml = http_get(feed_url)
-    root = ET.fromstring(rss_xml)
-
-    items = root.findall(".//item")
+    # Lookup and feed are revalidated with ETag/Last-Modified instead of re-downloaded
+    with DownloadManager(per_host=1) as downloads:
+        cache = HttpCache(downloads)
+        print("Fetching RSS feed URL…")
+        feed_url = fetch_feed_url(cache)
+        print("RSS:", feed_url)
+
+        rss_xml = cache.get(feed_url, FEED_TTL_SEC)
+    # Only the items published since the last finished run are parsed,
+    # oldest → newest with the same fallback numbers a full parse would give
+    state = FeedState(OUT_DIR / STATE_NAME)
+    items = state.new_items(rss_xml)
     if not items:
-        raise RuntimeError("No episodes found in RSS")
-
-    # Oldest → newest for sane numbering
-    items.reverse()
+        if not state.newest:
+            raise RuntimeError("No episodes found in RSS")
+        print("No new episodes since the last run.")
+        return
 
-    for idx, item in enumerate(items, start=1):
+    for idx, item in items:
         title_el = item.find("title")
         title = strip_html(title_el.text if title_el is not None else "")
         ep_num = find_episode_number(item, idx)
@@ -147,6 +154,8 @@ def main():
 
         time.sleep(SLEEP_SEC)
 
+    # Every new episode is saved, so the next run can stop parsing here
+    state.save()
     print("\nDone.")
 
 
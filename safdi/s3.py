@@ -1,9 +1,14 @@
-import json, urllib.request
+import json
+
+from downloads import DownloadManager
+from http_cache import FEED_TTL_SEC, LOOKUP_TTL_SEC, HttpCache
 
 PODCAST_ID="1447749859"
 lookup = f"https://itunes.apple.com/lookup?id={PODCAST_ID}"
-feed_url = json.loads(urllib.request.urlopen(lookup).read())["results"][0]["feedUrl"]
-rss = urllib.request.urlopen(feed_url).read().decode("utf-8", "ignore")
+with DownloadManager(per_host=1) as downloads:
+    cache = HttpCache(downloads)
+    feed_url = json.loads(cache.get(lookup, LOOKUP_TTL_SEC))["results"][0]["feedUrl"]
+    rss = cache.get(feed_url, FEED_TTL_SEC).decode("utf-8", "ignore")
 
 print("RSS:", feed_url)
 print("Has '<podcast:transcript' ?", "<podcast:transcript" in rss)
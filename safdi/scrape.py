@@ -1,14 +1,23 @@
 import os
 import re
 import json
-import time
 import shutil
+import sys
 import requests
 import feedparser
 from pathlib import Path
 from slugify import slugify
 from tqdm import tqdm
 
+# Shared helpers live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import pipeline_stats  # noqa: E402
+from cli_options import pop_option  # noqa: E402
+from downloads import DownloadManager  # noqa: E402
+from episode_pipeline import EpisodePipeline  # noqa: E402
+from http_cache import FEED_TTL_SEC, LOOKUP_TTL_SEC, HttpCache  # noqa: E402
+from whisper_pool import TranscriptionScheduler, WhisperTranscriber  # noqa: E402
+
 # ---------- CONFIG ----------
 PODCAST_ID = "1447749859"
 OUT_DIR = Path("transcripts")
@@ -16,17 +25,19 @@ AUDIO_DIR = Path("audio_tmp")
 MODEL_SIZE = "small"  # faster-whisper model: tiny/base/small/medium/large-v3
 LANGUAGE = "en"       # set None for auto-detect
 REQUEST_TIMEOUT = 60
-SLEEP_BETWEEN_EPISODES_SEC = 0.25  # be nice to hosts
+DOWNLOAD_WORKERS = 2    # enclosures downloaded in parallel
+TRANSCRIBE_WORKERS = 1  # episodes transcribed in parallel (they share one model)
+QUEUE_DEPTH = 2         # downloaded episodes allowed to wait for transcription
+PER_HOST_LIMIT = 2      # concurrent requests per host (be nice to hosts)
+BYTES_PER_AUDIO_SEC = 16_000  # ~128 kbps, to compare enclosure sizes with itunes:duration
 # ---------------------------
 
 
 APPLE_LOOKUP = "https://itunes.apple.com/lookup"
 
 
-def fetch_feed_url(itunes_id: str) -> str:
-    r = requests.get(APPLE_LOOKUP, params={"id": itunes_id}, timeout=REQUEST_TIMEOUT)
-    r.raise_for_status()
-    data = r.json()
+def fetch_feed_url(itunes_id: str, cache: HttpCache, ttl: float = LOOKUP_TTL_SEC) -> str:
+    data = json.loads(cache.get(f"{APPLE_LOOKUP}?id={itunes_id}", ttl))
     if not data.get("results"):
         raise RuntimeError("No results from Apple lookup API. Check podcast ID.")
     feed_url = data["results"][0].get("feedUrl")
@@ -116,18 +127,64 @@ def get_audio_url(entry):
     return None
 
 
-def download_file(url: str, dest: Path):
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    with requests.get(url, stream=True, timeout=REQUEST_TIMEOUT) as r:
-        r.raise_for_status()
-        total = int(r.headers.get("content-length") or 0)
-        with open(dest, "wb") as f, tqdm(
-            total=total, unit="B", unit_scale=True, desc=f"Downloading {dest.name}"
-        ) as pbar:
-            for chunk in r.iter_content(chunk_size=1024 * 512):
-                if chunk:
-                    f.write(chunk)
-                    pbar.update(len(chunk))
+def parse_duration(value) -> int | None:
+    """Seconds in an itunes:duration value ("3723", "62:03" or "1:02:03"), or None"""
+    try:
+        seconds = 0
+        for part in str(value).strip().split(":"):
+            seconds = seconds * 60 + int(float(part))
+        return seconds or None
+    except ValueError:
+        return None
+
+
+def estimated_duration(entry, audio_path: Path) -> float:
+    """
+    Episode length in seconds, for longest-first transcription: itunes:duration
+    when the feed has it, else the size of the downloaded audio or the
+    enclosure's declared length at BYTES_PER_AUDIO_SEC.
+    """
+    seconds = parse_duration(entry.get("itunes_duration"))
+    if seconds:
+        return seconds
+    if audio_path.exists():
+        return audio_path.stat().st_size / BYTES_PER_AUDIO_SEC
+    enclosures = entry.get("enclosures") or [l for l in entry.get("links", []) if l.get("rel") == "enclosure"]
+    for enclosure in enclosures:
+        try:
+            return int(enclosure.get("length") or 0) / BYTES_PER_AUDIO_SEC
+        except ValueError:
+            continue
+    return 0
+
+
+def audio_target(entry, ep_num_str: str):
+    """
+    Returns (audio_url, audio_path) for the episode's enclosure, or None if it has none.
+    """
+    audio_url = get_audio_url(entry)
+    if not audio_url:
+        return None
+
+    # Guess extension
+    ext = os.path.splitext(audio_url.split("?")[0])[1].lower()
+    if ext not in [".mp3", ".m4a", ".wav", ".ogg", ".aac"]:
+        ext = ".mp3"
+
+    return audio_url, AUDIO_DIR / f"{ep_num_str}{ext}"
+
+
+def download_file(url: str, dest: Path, downloads: DownloadManager):
+    with pipeline_stats.stage("download", dest.name) as counter, tqdm(
+        total=0, unit="B", unit_scale=True, desc=f"Downloading {dest.name}"
+    ) as pbar:
+        def progress(nbytes, total):
+            if total and pbar.total != total:
+                pbar.total = total
+                pbar.refresh()
+            pbar.update(nbytes)
+
+        counter.bytes = downloads.download(url, dest, progress)
 
 
 def fetch_transcript_text(url: str) -> str | None:
@@ -137,8 +194,10 @@ def fetch_transcript_text(url: str) -> str | None:
     - JSON (common for Podcasting 2.0) where it might include 'segments' or 'text'
     """
     try:
-        r = requests.get(url, timeout=REQUEST_TIMEOUT)
-        r.raise_for_status()
+        with pipeline_stats.stage("fetch", url) as counter:
+            r = requests.get(url, timeout=REQUEST_TIMEOUT)
+            r.raise_for_status()
+            counter.bytes = len(r.content)
         ct = (r.headers.get("content-type") or "").lower()
 
         # JSON transcript formats
@@ -173,30 +232,43 @@ def fetch_transcript_text(url: str) -> str | None:
         return None
 
 
-def transcribe_with_faster_whisper(audio_path: Path) -> str:
-    from faster_whisper import WhisperModel
+def save_transcript(out_path: Path, title: str, ep_num_str: str, entry, transcript_text: str):
+    header = f"{title}\nEpisode: {ep_num_str}\n"
+    published = entry.get("published")
+    if published:
+        header += f"Published: {published}\n"
+    header += "\n" + ("-" * 60) + "\n\n"
 
-    model = WhisperModel(MODEL_SIZE, device="auto", compute_type="auto")
-    segments, info = model.transcribe(
-        str(audio_path),
-        language=LANGUAGE,
-        vad_filter=True,
-        beam_size=5,
-    )
-    out = []
-    for seg in segments:
-        out.append(seg.text.strip())
-    return "\n".join(out).strip()
+    with pipeline_stats.stage("write", out_path.name) as counter:
+        counter.bytes = out_path.write_text(header + (transcript_text or ""), encoding="utf-8")
+    print(f"[saved] {out_path}")
 
 
 def main():
+    args = sys.argv[1:]
+    stats_path = pop_option(args, "--stats")  # JSON/CSV file for per-stage timings
+    feed_ttl = pop_option(args, "--feed-ttl", FEED_TTL_SEC, float)  # seconds before the feed is revalidated
+    lookup_ttl = pop_option(args, "--lookup-ttl", LOOKUP_TTL_SEC, float)  # seconds before the feed URL is looked up again
+    download_workers = pop_option(args, "--download-workers", DOWNLOAD_WORKERS, int)
+    transcribe_workers = pop_option(args, "--transcribe-workers", TRANSCRIBE_WORKERS, int)
+    queue_depth = pop_option(args, "--queue", QUEUE_DEPTH, int)  # downloaded episodes waiting for transcription
+    # CPU servers: transcribe on N worker processes (0 = split the cores automatically)
+    processes = pop_option(args, "--processes", None, int)
+    cpu_threads = pop_option(args, "--cpu-threads", 0, int)  # cores per worker process
+    if stats_path:
+        pipeline_stats.enable(stats_path)
+
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
-    feed_url = fetch_feed_url(PODCAST_ID)
-    print(f"RSS feed: {feed_url}")
+    downloads = DownloadManager(PER_HOST_LIMIT, REQUEST_TIMEOUT)
+    cache = HttpCache(downloads)
+    with pipeline_stats.stage("feed", PODCAST_ID):
+        feed_url = fetch_feed_url(PODCAST_ID, cache, lookup_ttl)
+        print(f"RSS feed: {feed_url}")
 
-    feed = feedparser.parse(feed_url)
+        # Revalidated with ETag/Last-Modified, so an unchanged feed is not downloaded again
+        feed = feedparser.parse(cache.get(feed_url, feed_ttl))
     episodes = list(feed.entries)
 
     if not episodes:
@@ -207,61 +279,80 @@ def main():
     # (if you prefer newest=1, change the indexing below).
     episodes_oldest_first = list(reversed(episodes))
 
+    todo = []
     for idx, entry in enumerate(episodes_oldest_first, start=1):
         ep_num = safe_episode_number(entry, fallback_index=idx)
         ep_num_str = f"{ep_num:03d}"
 
         title = entry.get("title", "").strip() or f"Episode {ep_num_str}"
-        base_name = f"{ep_num_str}.txt"
-        out_path = OUT_DIR / base_name
+        todo.append((ep_num_str, title, entry, OUT_DIR / f"{ep_num_str}.txt"))
+
+    # Loaded on the first episode that needs it, then reused for the whole run
+    if processes is not None:
+        transcriber = TranscriptionScheduler(MODEL_SIZE, LANGUAGE, processes, cpu_threads)
+        transcribe_workers = transcriber.processes
+    else:
+        transcriber = WhisperTranscriber(MODEL_SIZE, LANGUAGE)
+    with downloads:
+        # 1) Episodes with a published transcript (or no audio) are saved right away
+        audio_jobs = []
+        for ep_num_str, title, entry, out_path in todo:
+            base_name = out_path.name
+            if out_path.exists() and out_path.stat().st_size > 0:
+                print(f"[skip] {base_name} already exists")
+                continue
 
-        if out_path.exists() and out_path.stat().st_size > 0:
-            print(f"[skip] {base_name} already exists")
-            continue
+            transcript_urls = find_transcript_urls(entry)
+            transcript_text = None
+            for tu in transcript_urls:
+                transcript_text = fetch_transcript_text(tu)
+                if transcript_text and transcript_text.strip():
+                    print(f"\n=== Episode {ep_num_str}: {title} ===")
+                    print(f"[ok] downloaded transcript from: {tu}")
+                    break
+            if transcript_text:
+                save_transcript(out_path, title, ep_num_str, entry, transcript_text)
+                continue
 
-        print(f"\n=== Episode {ep_num_str}: {title} ===")
-
-        # 1) Try to fetch published transcript URL(s)
-        transcript_urls = find_transcript_urls(entry)
-        transcript_text = None
-        for tu in transcript_urls:
-            transcript_text = fetch_transcript_text(tu)
-            if transcript_text and transcript_text.strip():
-                print(f"[ok] downloaded transcript from: {tu}")
-                break
-
-        # 2) If no transcript, download audio + transcribe
-        if not transcript_text:
-            audio_url = get_audio_url(entry)
-            if not audio_url:
-                print("[warn] no audio enclosure found; writing placeholder")
+            target = audio_target(entry, ep_num_str)
+            if not target:
+                print(f"[warn] {ep_num_str}: no audio enclosure found; writing placeholder")
                 out_path.write_text(f"{title}\n\n(No audio URL found in RSS.)", encoding="utf-8")
                 continue
+            audio_jobs.append((ep_num_str, title, entry, out_path, *target))
 
-            # Guess extension
-            ext = os.path.splitext(audio_url.split("?")[0])[1].lower()
-            if ext not in [".mp3", ".m4a", ".wav", ".ogg", ".aac"]:
-                ext = ".mp3"
-
-            audio_path = AUDIO_DIR / f"{ep_num_str}{ext}"
-
+        # 2) The rest are downloaded and transcribed in a pipeline, so the next
+        #    episode's audio arrives while the current one is transcribed
+        def fetch_audio(job):
+            *_, audio_url, audio_path = job
             if not audio_path.exists():
-                download_file(audio_url, audio_path)
-
-            print("[run] transcribing with faster-whisper...")
-            transcript_text = transcribe_with_faster_whisper(audio_path)
-
-        # 3) Save transcript
-        header = f"{title}\nEpisode: {ep_num_str}\n"
-        published = entry.get("published")
-        if published:
-            header += f"Published: {published}\n"
-        header += "\n" + ("-" * 60) + "\n\n"
-
-        out_path.write_text(header + (transcript_text or ""), encoding="utf-8")
-        print(f"[saved] {out_path}")
-
-        time.sleep(SLEEP_BETWEEN_EPISODES_SEC)
+                download_file(audio_url, audio_path, downloads)
+            return audio_path
+
+        if audio_jobs:
+            print(f"\nTranscribing {len(audio_jobs)} episode(s) with faster-whisper "
+                  f"({download_workers} download / {transcribe_workers} transcription worker(s))...")
+            priority = None
+            if isinstance(transcriber, TranscriptionScheduler):
+                # Longest episodes are downloaded and transcribed first, so a backfill
+                # keeps every worker busy and does not end on one long episode
+                priority = lambda job: estimated_duration(job[2], job[-1])  # noqa: E731
+                transcriber.begin_batch()
+            pipeline = EpisodePipeline(fetch_audio, transcriber.transcribe,
+                                       download_workers, transcribe_workers, queue_depth, priority)
+            try:
+                for (ep_num_str, title, entry, out_path, *_), transcript_text, error in pipeline.run(audio_jobs):
+                    print(f"\n=== Episode {ep_num_str}: {title} ===")
+                    if error:
+                        print(f"[error] {error}")
+                        continue
+                    save_transcript(out_path, title, ep_num_str, entry, transcript_text)
+                print("\n" + pipeline.report())
+                if isinstance(transcriber, TranscriptionScheduler):
+                    print(transcriber.report())
+            finally:
+                if isinstance(transcriber, TranscriptionScheduler):
+                    transcriber.close()
 
     # Cleanup audio temp if you want
     # shutil.rmtree(AUDIO_DIR, ignore_errors=True)
@@ -1,22 +1,30 @@
-import os, json, time, subprocess, urllib.request, xml.etree.ElementTree as ET
+import os, json, subprocess
 from pathlib import Path
 
+from downloads import DownloadManager
+from episode_pipeline import EpisodePipeline
+from feed_items import STATE_NAME, FeedState
+from http_cache import FEED_TTL_SEC, LOOKUP_TTL_SEC, HttpCache
+
 PODCAST_ID = "1447749859"
 OUT_DIR = Path("transcripts")
 AUDIO_DIR = Path("audio")
-SLEEP_SEC = 0.25
+DOWNLOAD_WORKERS = 2    # enclosures downloaded in parallel
+TRANSCRIBE_WORKERS = 2  # transcription requests in flight at once
+QUEUE_DEPTH = 2         # downloaded episodes allowed to wait for transcription
+PER_HOST_LIMIT = 2      # concurrent requests per host (be nice to hosts)
 
 # Choose one of these models:
 MODEL = "gpt-4o-mini-transcribe"  # or "gpt-4o-transcribe"
 # See OpenAI speech-to-text docs for models / endpoint.   [oai_citation:2‡OpenAI Platform](https://platform.openai.com/docs/guides/speech-to-text?utm_source=chatgpt.com)
 
-def http_get(url: str) -> bytes:
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        return resp.read()
+# One keep-alive session for the feed, the lookup and every enclosure
+downloads = DownloadManager(PER_HOST_LIMIT, timeout=120)
+# Lookup and feed are revalidated with ETag/Last-Modified instead of re-downloaded
+cache = HttpCache(downloads)
 
 def fetch_feed_url(podcast_id: str) -> str:
-    data = json.loads(http_get(f"https://itunes.apple.com/lookup?id={podcast_id}"))
+    data = json.loads(cache.get(f"https://itunes.apple.com/lookup?id={podcast_id}", LOOKUP_TTL_SEC))
     return data["results"][0]["feedUrl"]
 
 def get_text(el, default=""):
@@ -44,8 +52,16 @@ def download(url: str, dest: Path):
     dest.parent.mkdir(parents=True, exist_ok=True)
     if dest.exists() and dest.stat().st_size > 0:
         return
-    data = http_get(url)
-    dest.write_bytes(data)
+    downloads.download(url, dest)
+
+def audio_path_for(audio_url: str, ep_str: str) -> Path:
+    # guess extension
+    ext = ".mp3"
+    for e in (".mp3", ".m4a", ".wav", ".aac", ".ogg"):
+        if audio_url.split("?")[0].lower().endswith(e):
+            ext = e
+            break
+    return AUDIO_DIR / f"{ep_str}{ext}"
 
 def transcribe_with_curl(audio_path: Path) -> str:
     api_key = os.environ.get("OPENAI_API_KEY")
@@ -76,50 +92,68 @@ def main():
     feed_url = fetch_feed_url(PODCAST_ID)
     print("RSS:", feed_url)
 
-    root = ET.fromstring(http_get(feed_url))
-    items = root.findall(".//item")
+    # Only the items published since the last finished run are parsed,
+    # oldest -> newest with the same fallback numbers a full parse would give
+    state = FeedState(OUT_DIR / STATE_NAME)
+    items = state.new_items(cache.get(feed_url, FEED_TTL_SEC))
     if not items:
-        raise RuntimeError("No episodes found in RSS")
-
-    # Oldest -> newest so fallback numbering is stable
-    items.reverse()
+        if not state.newest:
+            raise RuntimeError("No episodes found in RSS")
+        print("No new episodes since the last run.")
+        return
 
-    for idx, item in enumerate(items, start=1):
+    episodes = []
+    for idx, item in items:
         title = get_text(item.find("title"), f"Episode {idx}")
-        ep_num = find_episode_number(item, idx)
-        ep_str = f"{ep_num:03d}"
+        ep_str = f"{find_episode_number(item, idx):03d}"
+        episodes.append((ep_str, title, get_enclosure_url(item), OUT_DIR / f"{ep_str}.txt"))
 
-        out_txt = OUT_DIR / f"{ep_str}.txt"
+    todo = []
+    for ep_str, title, audio_url, out_txt in episodes:
         if out_txt.exists() and out_txt.stat().st_size > 0:
             print(f"[skip] {out_txt.name}")
             continue
 
-        audio_url = get_enclosure_url(item)
         if not audio_url:
             print(f"[warn] no enclosure url for {ep_str}: {title}")
             out_txt.write_text(f"{title}\nEpisode: {ep_str}\n\n(No audio URL found in RSS.)\n", encoding="utf-8")
             continue
-
-        # guess extension
-        ext = ".mp3"
-        for e in (".mp3", ".m4a", ".wav", ".aac", ".ogg"):
-            if audio_url.split("?")[0].lower().endswith(e):
-                ext = e
-                break
-
-        audio_path = AUDIO_DIR / f"{ep_str}{ext}"
-        print(f"\nDownloading {ep_str}: {title}")
+        todo.append((ep_str, title, audio_url, out_txt))
+
+    # Downloads run ahead of transcription through a bounded queue,
+    # so the next episode's audio arrives while the current one is transcribed
+    def fetch_audio(job):
+        ep_str, title, audio_url, _ = job
+        audio_path = audio_path_for(audio_url, ep_str)
+        print(f"Downloading {ep_str}: {title}")
         download(audio_url, audio_path)
+        return audio_path
+
+    failed = 0
+    if todo:
+        print(f"Transcribing {len(todo)} episode(s) with {MODEL}...")
+        pipeline = EpisodePipeline(fetch_audio, transcribe_with_curl,
+                                   DOWNLOAD_WORKERS, TRANSCRIBE_WORKERS, QUEUE_DEPTH)
+        for (ep_str, title, _, out_txt), text, error in pipeline.run(todo):
+            if error:
+                print(f"[error] {ep_str}: {error}")
+                failed += 1
+                continue
+            out_txt.write_text(f"{title}\nEpisode: {ep_str}\n\n" + ("-"*60) + "\n\n" + text + "\n", encoding="utf-8")
+            print(f"[saved] {out_txt}")
+        print("\n" + pipeline.report())
+
+    if failed:
+        # Keep the feed state where it was so the failed episodes are retried
+        print(f"\n{failed} episode(s) failed; they will be retried on the next run.")
+        return
 
-        print(f"Transcribing {ep_str} with {MODEL}...")
-        text = transcribe_with_curl(audio_path)
-
-        out_txt.write_text(f"{title}\nEpisode: {ep_str}\n\n" + ("-"*60) + "\n\n" + text + "\n", encoding="utf-8")
-        print(f"[saved] {out_txt}")
-
-        time.sleep(SLEEP_SEC)
-
+    # Every new episode is done, so the next run can stop parsing here
+    state.save()
     print("\nDone.")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        downloads.close()
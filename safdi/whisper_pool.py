@@ -0,0 +1,233 @@
+"""
+faster-whisper transcription, in-process or spread over worker processes.
+
+WhisperTranscriber loads a model once and reuses it. TranscriptionScheduler
+runs several worker processes, each with its own model and an explicit share
+of the CPU cores (cpu_threads) and num_workers, hands out the longest
+episodes first so the batch finishes evenly, restarts the pool if a worker
+crashes, and reports the aggregate real-time factor.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# Shared helpers live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import pipeline_stats  # noqa: E402
+
+MAX_ATTEMPTS = 2  # a file whose worker crashed this many times is given up
+# Pools are started lazily from pipeline threads, so their workers must not
+# be forked from this (multi-threaded) process
+_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class WhisperTranscriber:
+    """
+    faster-whisper engine that loads its model on first use and keeps it warm
+    for the rest of the run. transcribe() handles one audio file;
+    transcribe_many() takes any number and yields (audio_path, text) as each
+    one finishes, all on the same model.
+    """
+
+    def __init__(self, model_size: str = "small", language: str | None = None,
+                 device: str = "auto", compute_type: str = "auto",
+                 cpu_threads: int = 0, num_workers: int = 1):
+        self.model_size = model_size
+        self.language = language
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads  # 0 lets CTranslate2 pick
+        self.num_workers = num_workers
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:  # pipeline workers may ask for it at the same time
+            if self._model is None:
+                from faster_whisper import WhisperModel
+
+                with pipeline_stats.stage("load_model", self.model_size):
+                    self._model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type,
+                                               cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+        return self._model
+
+    def transcribe(self, audio_path: Path) -> str:
+        return self.transcribe_info(audio_path)[0]
+
+    def transcribe_info(self, audio_path: Path):
+        """Returns (text, audio duration in seconds)"""
+        model = self.model
+        # Segments are decoded lazily, so the transcription happens in the loop
+        with pipeline_stats.stage("transcribe", audio_path.name, nbytes=audio_path.stat().st_size):
+            segments, info = model.transcribe(
+                str(audio_path),
+                language=self.language,
+                vad_filter=True,
+                beam_size=5,
+            )
+            out = []
+            for seg in segments:
+                out.append(seg.text.strip())
+        return "\n".join(out).strip(), info.duration
+
+    def transcribe_many(self, audio_paths):
+        for audio_path in audio_paths:
+            yield audio_path, self.transcribe(Path(audio_path))
+
+
+# ---------- worker processes ----------
+
+_worker = None  # this worker process's WhisperTranscriber
+
+
+def _init_worker(model_size, language, compute_type, cpu_threads, num_workers):
+    global _worker
+    _worker = WhisperTranscriber(model_size, language, device="cpu", compute_type=compute_type,
+                                 cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+def _transcribe_job(audio_path):
+    start = time.perf_counter()
+    text, duration = _worker.transcribe_info(Path(audio_path))
+    return text, duration, time.perf_counter() - start
+
+
+class TranscriptionScheduler:
+    """
+    Transcribes on `processes` worker processes with cpu_threads cores each
+    (by default the machine's cores split evenly between them).
+
+    transcribe(audio_path) is blocking and thread-safe, so it can be the
+    transcription stage of an EpisodePipeline with one thread per process
+    (give the pipeline a priority to get longest-first order there);
+    run(audio_paths) transcribes a batch longest-first and yields
+    (audio_path, text, error) as each file finishes. If a worker dies the
+    pool is restarted and the files it was working on are retried one at a
+    time in a separate single-process pool, so a file that keeps crashing
+    its worker cannot take the others down with it.
+    """
+
+    def __init__(self, model_size: str = "small", language: str | None = None, processes: int = 0,
+                 cpu_threads: int = 0, num_workers: int = 1, compute_type: str = "auto",
+                 max_attempts: int = MAX_ATTEMPTS):
+        cores = os.cpu_count() or 1
+        self.processes = processes if processes > 0 else max(1, cores // max(1, cpu_threads or 4))
+        self.cpu_threads = cpu_threads if cpu_threads > 0 else max(1, cores // self.processes)
+        self.num_workers = max(1, num_workers)
+        self.max_attempts = max(1, max_attempts)
+        self._init_args = (model_size, language, compute_type, self.cpu_threads, self.num_workers)
+        self._lock = threading.Lock()
+        self._retry_lock = threading.Lock()  # retries run one at a time
+        self._pools = {}  # isolated? -> ProcessPoolExecutor
+        self._closed = False
+        self.begin_batch()
+
+    def begin_batch(self):
+        """Reset the figures report() prints, so they cover only what is transcribed from now on"""
+        with self._lock:
+            self.restarts = 0
+            self.audio_seconds = 0.0  # duration of everything transcribed
+            self.busy_seconds = 0.0   # worker time spent on it
+            self.files = 0
+            self.started = None
+            self.wall = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for pool in self._pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._pools.clear()
+
+    def _run_job(self, audio_path, isolated: bool):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TranscriptionScheduler is closed")
+            pool = self._pools.get(isolated)
+            if pool is None:
+                pool = self._pools[isolated] = ProcessPoolExecutor(
+                    max_workers=1 if isolated else self.processes, mp_context=_CONTEXT,
+                    initializer=_init_worker, initargs=self._init_args)
+        try:
+            return pipeline_stats.result(pipeline_stats.submit(pool, _transcribe_job, str(audio_path)))
+        except BrokenProcessPool:
+            with self._lock:
+                # Several callers see the same crash; only the first one replaces the pool
+                if self._pools.get(isolated) is pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    del self._pools[isolated]
+                    self.restarts += 1
+            raise
+
+    def transcribe(self, audio_path: Path) -> str:
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if attempt == 1:
+                    text, duration, seconds = self._run_job(audio_path, isolated=False)
+                else:
+                    with self._retry_lock:
+                        text, duration, seconds = self._run_job(audio_path, isolated=True)
+                break
+            except BrokenProcessPool:
+                if attempt == self.max_attempts:
+                    raise RuntimeError(f"transcription worker crashed {attempt} time(s) on {Path(audio_path).name}")
+        with self._lock:
+            self.audio_seconds += duration or 0.0
+            self.busy_seconds += seconds
+            self.files += 1
+            self.wall = time.perf_counter() - self.started
+        return text
+
+    def run(self, audio_paths):
+        # Longest first: audio size stands in for duration, which is only known after decoding
+        audio_paths = sorted(map(Path, audio_paths), key=lambda p: p.stat().st_size, reverse=True)
+        if not audio_paths:
+            return
+        self.begin_batch()
+        with ThreadPoolExecutor(max_workers=self.processes, thread_name_prefix="transcribe") as threads:
+            futures = {threads.submit(self.transcribe, audio_path): audio_path for audio_path in audio_paths}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result(), None
+                    except Exception as e:
+                        yield futures[future], None, e
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def report(self) -> str:
+        """
+        Real-time factors (processing time / audio time) since begin_batch().
+
+        The aggregate RTF uses the wall time from the first transcription of
+        the batch to the last one finishing; inside a pipeline that includes
+        any time the workers spent waiting for downloads. The per-worker RTF
+        counts only time spent transcribing.
+        """
+        lines = [f"Transcription: {self.files} file(s), {self.audio_seconds / 3600:.2f} h of audio in "
+                 f"{self.wall:.1f}s wall on {self.processes} process(es) x {self.cpu_threads} thread(s)"]
+        if self.audio_seconds > 0 and self.wall > 0:
+            rtf = self.wall / self.audio_seconds
+            lines.append(f"  aggregate RTF {rtf:.3f} ({1 / rtf:.1f}x real time, wall time incl. waiting), "
+                         f"per-worker RTF {self.busy_seconds / self.audio_seconds:.3f}")
+        if self.restarts:
+            lines.append(f"  worker pool restarted {self.restarts} time(s) after a crash")
+        return "\n".join(lines)
@@ -17,7 +17,7 @@ echo "✓ Python 3 found"
 # Install Python libraries
 echo ""
 echo "Installing Python libraries..."
-pip3 install --user pdfplumber python-pptx python-docx openpyxl Pillow pytesseract SpeechRecognition pydub 2>&1 | grep -E "(Successfully|Requirement|Error)" | tail -5
+pip3 install --user pdfplumber python-pptx python-docx openpyxl Pillow pytesseract faster-whisper numpy 2>&1 | grep -E "(Successfully|Requirement|Error)" | tail -5
 
 # Check for Tesseract OCR (required for image OCR)
 if ! command -v tesseract &> /dev/null; then
@@ -29,10 +29,10 @@ else
     echo "✓ Tesseract OCR found"
 fi
 
-# Check for ffmpeg (helpful for audio processing)
+# Check for ffmpeg (required for offline audio transcription)
 if ! command -v ffmpeg &> /dev/null; then
     echo ""
-    echo "ℹ ffmpeg not found (optional, for better audio processing):"
+    echo "ℹ ffmpeg not found (required for audio transcription):"
     echo "   brew install ffmpeg"
     echo ""
 else